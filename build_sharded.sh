@@ -0,0 +1,12 @@
+# builds the site as N shard processes, then merges them into docs/
+shards=${1:-4}
+shift
+pids=""
+for i in $(seq 1 "$shards"); do
+    python3 src/main.py --shard "$i/$shards" -q "$@" &
+    pids="$pids $!"
+done
+for pid in $pids; do
+    wait "$pid" || exit 1
+done
+python3 src/main.py "$@" --merge-shards ./shards/*-of-"$shards"
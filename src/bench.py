@@ -0,0 +1,156 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from copystatic import copy_files_recursive
+from corpus import SHAPES, generate_corpus
+from gencontent import generate_pages_recursive
+from inline_markdown import text_to_textnodes
+from markdown_blocks import iter_blocks, markdown_to_html_node
+
+
+DEFAULT_THRESHOLD = 0.2
+TEMPLATE = (
+    "<html><head><title>{{ Title }}</title>"
+    '<link href="/index.css" rel="stylesheet"></head>'
+    "<body><article>{{ Content }}</article></body></html>"
+)
+
+
+def time_call(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings)}
+
+
+def read_corpus(paths):
+    documents = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            documents.append(f.read())
+    return documents
+
+
+def write_static_tree(dest_dir_path, files, size):
+    for i in range(files):
+        path = os.path.join(dest_dir_path, "images", f"dir{i % 8}", f"image{i}.png")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(bytes([i % 256]) * size)
+
+
+def run_benchmarks(root, pages, size, repeat, shapes):
+    results = {}
+    for shape in shapes:
+        content = os.path.join(root, "content", shape)
+        documents = read_corpus(generate_corpus(content, pages, shape, size))
+        buffers = [md.encode("utf-8") for md in documents]
+        blocks = [block for md in documents for block, _ in iter_blocks(md)]
+        nodes = [markdown_to_html_node(md) for md in documents]
+
+        # pages are split and typed by iter_blocks, from text or, when the
+        # source is memory-mapped, from its bytes
+        results[f"{shape}/iter_blocks"] = time_call(
+            lambda: [list(iter_blocks(md)) for md in documents], repeat
+        )
+        results[f"{shape}/iter_blocks_bytes"] = time_call(
+            lambda: [list(iter_blocks(buffer)) for buffer in buffers], repeat
+        )
+        results[f"{shape}/text_to_textnodes"] = time_call(
+            lambda: [text_to_textnodes(block) for block in blocks if block[0] != "`"],
+            repeat,
+        )
+        results[f"{shape}/markdown_to_html_node"] = time_call(
+            lambda: [markdown_to_html_node(md) for md in documents], repeat
+        )
+        results[f"{shape}/to_html"] = time_call(
+            lambda: [node.to_html() for node in nodes], repeat
+        )
+
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w") as f:
+        f.write(TEMPLATE)
+    content = os.path.join(root, "content")
+    public = os.path.join(root, "public")
+    results["build/generate_pages_recursive"] = time_call(
+        lambda: generate_pages_recursive(content, template_path, public, "/"), repeat
+    )
+
+    static = os.path.join(root, "static")
+    write_static_tree(static, pages, 64 * 1024)
+    copies = iter(range(repeat))
+    results["build/copy_files_recursive"] = time_call(
+        lambda: copy_files_recursive(
+            static, os.path.join(root, f"static{next(copies)}")
+        ),
+        repeat,
+    )
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            print(f"{name:45} {result['min'] * 1000:10.2f} ms   (new)")
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:45} {result['min'] * 1000:10.2f} ms   x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the site generator.")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--size", type=int, default=20, help="blocks per page")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--shape", action="append", choices=SHAPES)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="compare against a saved results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        results = run_benchmarks(
+            root, args.pages, args.size, args.repeat, args.shape or SHAPES
+        )
+    report = {
+        "python": platform.python_version(),
+        "pages": args.pages,
+        "size": args.size,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) regressed more than "
+            f"{args.threshold:.0%}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+from corpus import generate_page
+from markdown_blocks import markdown_to_html_node
+
+
+def measure(pages, paragraphs, trace=False):
+    # tracemalloc's own bookkeeping inflates the process, so peak RSS is only
+    # reported for untraced runs
+    rng = random.Random(0)
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    trees = [
+        markdown_to_html_node(generate_page(rng, i, "paragraphs", paragraphs))
+        for i in range(pages)
+    ]
+    elapsed = time.perf_counter() - start
+    result = {"pages": len(trees), "seconds": elapsed}
+    if trace:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["retained_bytes"] = current
+        result["peak_traced_bytes"] = peak
+    else:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != "darwin":
+            max_rss *= 1024
+        result["peak_rss_bytes"] = max_rss
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure memory used to hold the node trees of a large corpus."
+    )
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=100)
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="report bytes traced by tracemalloc instead of peak RSS",
+    )
+    args = parser.parse_args()
+    result = measure(args.pages, args.paragraphs, args.trace)
+    for key, value in result.items():
+        if key.endswith("_bytes"):
+            print(f"{key}: {value / 1e6:.1f} MB")
+        elif key == "seconds":
+            print(f"{key}: {value:.3f}")
+        else:
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import hashlib
+from collections import OrderedDict
+
+
+RENDERER_VERSION = "1"
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class BlockCache:
+    def __init__(
+        self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, block):
+        digest = hashlib.blake2b(RENDERER_VERSION.encode(), digest_size=16)
+        digest.update(block.encode("utf-8"))
+        return digest.digest()
+
+    def get(self, key):
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return html
+
+    def put(self, key, html):
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        self.entries[key] = html
+        self.size += len(html)
+        while self.entries and (
+            len(self.entries) > self.max_entries or self.size > self.max_bytes
+        ):
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return (
+            f"BlockCache({len(self.entries)} blocks, {self.size} chars, "
+            f"{self.hits} hits, {self.misses} misses)"
+        )
@@ -0,0 +1,66 @@
+import argparse
+import json
+import socket
+import sys
+
+
+# imports only the standard library, so asking a running daemon for a build
+# costs an interpreter start and one round trip, not a full import
+DEFAULT_SOCKET_PATH = "./.cache/build.sock"
+
+
+def request_build(socket_path=DEFAULT_SOCKET_PATH, timeout=None, **changes):
+    # changes override the daemon's settings for this build only
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall(json.dumps(changes).encode("utf-8") + b"\n")
+        with client.makefile("rb") as reply:
+            line = reply.readline()
+    if not line:
+        raise ConnectionError(f"no reply from {socket_path}")
+    return json.loads(line)
+
+
+def parse_setting(text):
+    name, separator, value = text.partition("=")
+    if separator == "":
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text}")
+    try:
+        return name.replace("-", "_"), json.loads(value)
+    except ValueError:
+        return name.replace("-", "_"), value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Ask a running build daemon (main.py --daemon) for a build."
+    )
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    parser.add_argument(
+        "settings",
+        nargs="*",
+        type=parse_setting,
+        metavar="NAME=VALUE",
+        help="build settings for this request, e.g. basepath=/site/ search=true",
+    )
+    args = parser.parse_args(argv)
+    result = request_build(args.socket, **dict(args.settings))
+    changes = result.get("changes", {})
+    if result["ok"]:
+        print(
+            f"Built in {result['seconds'] * 1000:.1f} ms: "
+            f"{len(changes['added'])} added, {len(changes['changed'])} changed, "
+            f"{len(changes['removed'])} removed"
+        )
+        return
+    print(f"Error: {result['error']}")
+    for source, error in result.get("failures", []):
+        print(f" ! {source}: {error}")
+    for link in result.get("broken_links", []):
+        print(link)
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
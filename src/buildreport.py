@@ -0,0 +1,87 @@
+import contextlib
+import json
+import time
+import tracemalloc
+
+
+PAGE_PHASES = ("read", "parse", "render", "write")
+
+
+class BuildReport:
+    def __init__(self):
+        self.phases = {}
+        self.pages = []
+        self.start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            allocated_before = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            stats = {
+                "wall": time.perf_counter() - wall_start,
+                "cpu": time.process_time() - cpu_start,
+            }
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                stats["allocated"] = current - allocated_before
+                stats["peak"] = peak - allocated_before
+            self.add_phase(name, stats)
+
+    def add_phase(self, name, stats):
+        totals = self.phases.setdefault(name, {"count": 0})
+        totals["count"] += 1
+        for key, value in stats.items():
+            if key == "peak":
+                totals[key] = max(totals.get(key, 0), value)
+            else:
+                totals[key] = totals.get(key, 0) + value
+
+    def add_page(self, stats):
+        self.pages.append(stats)
+        for name in PAGE_PHASES:
+            if name in stats:
+                self.add_phase(f"page.{name}", {"wall": stats[name]})
+
+    def slowest_pages(self, limit=5):
+        return sorted(self.pages, key=lambda page: page["wall"], reverse=True)[:limit]
+
+    def to_dict(self):
+        return {
+            "wall": time.perf_counter() - self.start,
+            "phases": self.phases,
+            "pages": self.pages,
+        }
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+    def summary(self, limit=5):
+        lines = [f"Built {len(self.pages)} page(s) in {self.to_dict()['wall']:.3f}s"]
+        for name, totals in self.phases.items():
+            line = f"  {name:12} {totals['wall'] * 1000:9.1f} ms"
+            if "cpu" in totals:
+                line += f"  cpu {totals['cpu'] * 1000:9.1f} ms"
+            if "allocated" in totals:
+                line += f"  alloc {totals['allocated'] / 1024:9.1f} KiB"
+            lines.append(line)
+        slowest = self.slowest_pages(limit)
+        if slowest:
+            lines.append("Slowest pages:")
+            for page in slowest:
+                lines.append(f"  {page['wall'] * 1000:9.1f} ms  {page['source']}")
+        return "\n".join(lines)
+
+
+def phase(report, name):
+    if report is None:
+        return contextlib.nullcontext()
+    return report.phase(name)
@@ -0,0 +1,133 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from linkcheck import find_output_files
+from manifest import hash_file, load_manifest, remove_output, save_manifest
+from output import AtomicFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESS_MANIFEST_FILENAME = ".compress-manifest.json"
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".js", ".json", ".svg", ".txt", ".xml")
+
+
+def gzip_bytes(data):
+    # a fixed mtime keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def zstd_bytes(data):
+    return zstandard.ZstdCompressor(level=19).compress(data)
+
+
+def available_encoders():
+    encoders = {".gz": gzip_bytes}
+    if brotli is not None:
+        encoders[".br"] = brotli.compress
+    if zstandard is not None:
+        encoders[".zst"] = zstd_bytes
+    return encoders
+
+
+def is_compressible(rel_path):
+    return rel_path.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def compressed_variants(rel_paths):
+    suffixes = available_encoders()
+    return {
+        rel_path + suffix
+        for rel_path in rel_paths
+        if is_compressible(rel_path)
+        for suffix in suffixes
+    }
+
+
+def compress_file(path, encoders):
+    with open(path, "rb") as f:
+        data = f.read()
+    variants = []
+    for suffix, encode in encoders.items():
+        compressed = encode(data)
+        # servers fall back to the original when a variant is missing, so
+        # variants that would not be smaller are not written at all
+        if len(compressed) >= len(data):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+            continue
+        with AtomicFile(path + suffix, "wb") as f:
+            f.write(compressed)
+        variants.append(suffix)
+    return variants
+
+
+def compress_outputs(dest_dir_path, exclude=(), workers=None, verbose=True):
+    manifest_path = os.path.join(dest_dir_path, COMPRESS_MANIFEST_FILENAME)
+    manifest = load_manifest(manifest_path)
+    old_files = manifest.get("files", {})
+    exclude = set(exclude) | {COMPRESS_MANIFEST_FILENAME}
+    encoders = available_encoders()
+    encodings = sorted(encoders)
+    same_encodings = manifest.get("encodings") == encodings
+
+    new_files = {}
+    stale = []
+    for rel_path in sorted(find_output_files(dest_dir_path)):
+        if not is_compressible(rel_path) or rel_path in exclude:
+            continue
+        path = os.path.join(dest_dir_path, rel_path)
+        stat = os.stat(path)
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        old_entry = old_files.get(rel_path, {})
+        if old_entry.get("size") == entry["size"] and old_entry.get(
+            "mtime"
+        ) == entry["mtime"]:
+            entry["sha256"] = old_entry.get("sha256") or hash_file(path)
+        else:
+            entry["sha256"] = hash_file(path)
+        new_files[rel_path] = entry
+        variants = old_entry.get("variants")
+        if (
+            same_encodings
+            and variants is not None
+            and old_entry.get("sha256") == entry["sha256"]
+            and all(os.path.exists(path + suffix) for suffix in variants)
+        ):
+            entry["variants"] = variants
+            continue
+        stale.append(rel_path)
+
+    # zlib and the optional encoders release the GIL while compressing, so
+    # threads are enough to use every core
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                compress_file, os.path.join(dest_dir_path, rel_path), encoders
+            )
+            for rel_path in stale
+        ]
+        for rel_path, future in zip(stale, futures):
+            if verbose:
+                print(f" * compressing {os.path.join(dest_dir_path, rel_path)}")
+            new_files[rel_path]["variants"] = future.result()
+
+    for rel_path, old_entry in old_files.items():
+        kept = new_files.get(rel_path, {}).get("variants", [])
+        for suffix in old_entry.get("variants", []):
+            if suffix not in kept:
+                remove_output(
+                    os.path.join(dest_dir_path, rel_path + suffix), dest_dir_path
+                )
+
+    save_manifest(manifest_path, {"encodings": encodings, "files": new_files})
+    return stale
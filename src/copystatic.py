@@ -1,17 +1,163 @@
 import os
 import shutil
 
+from manifest import hash_file, load_manifest, remove_output, save_manifest
+from output import copy_if_changed
 
-def copy_files_recursive(source_dir_path, dest_dir_path):
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+STATIC_MANIFEST_FILENAME = ".static-manifest.json"
+FICLONE = 0x40049409
+
+
+def copy_files_recursive(source_dir_path, dest_dir_path, verbose=True):
     if not os.path.exists(dest_dir_path):
         os.mkdir(dest_dir_path)
 
     for filename in os.listdir(source_dir_path):
         from_path = os.path.join(source_dir_path, filename)
         dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
+        if verbose:
+            print(f" * {from_path} -> {dest_path}")
         if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
+            copy_if_changed(from_path, dest_path)
+        else:
+            copy_files_recursive(from_path, dest_path, verbose)
+
+
+def find_static_files(source_dir_path, rel_dir_path=""):
+    files = []
+    for filename in sorted(os.listdir(os.path.join(source_dir_path, rel_dir_path))):
+        rel_path = os.path.join(rel_dir_path, filename)
+        if os.path.isfile(os.path.join(source_dir_path, rel_path)):
+            files.append(rel_path)
         else:
-            copy_files_recursive(from_path, dest_path)
+            files.extend(find_static_files(source_dir_path, rel_path))
+    return files
+
+
+def sync_files_recursive(
+    source_dir_path, dest_dir_path, checksum=False, hardlink=False, verbose=True
+):
+    manifest_path = os.path.join(dest_dir_path, STATIC_MANIFEST_FILENAME)
+    old_files = load_manifest(manifest_path).get("files", {})
+    new_files = {}
+    placed_by_hash = {}
+
+    for rel_path in find_static_files(source_dir_path):
+        from_path = os.path.join(source_dir_path, rel_path)
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        stat = os.stat(from_path)
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        old_entry = old_files.get(rel_path, {})
+        same_source = old_entry.get("size") == entry["size"] and old_entry.get(
+            "mtime"
+        ) == entry["mtime"]
+        if checksum:
+            if same_source:
+                entry["sha256"] = old_entry.get("sha256") or hash_file(from_path)
+            else:
+                entry["sha256"] = hash_file(from_path)
+        new_files[rel_path] = entry
+        digest = entry.get("sha256")
+
+        if is_up_to_date(from_path, dest_path, stat, entry, old_entry, same_source):
+            entry["dest"] = dest_state(os.stat(dest_path))
+            if digest is not None:
+                placed_by_hash.setdefault(digest, dest_path)
+            continue
+
+        if verbose:
+            print(f" * {from_path} -> {dest_path}")
+        if digest in placed_by_hash and link_file(placed_by_hash[digest], dest_path):
+            entry["dest"] = dest_state(os.stat(dest_path))
+            continue
+        place_file(from_path, dest_path, hardlink)
+        entry["dest"] = dest_state(os.stat(dest_path))
+        if digest is not None:
+            placed_by_hash[digest] = dest_path
+
+    for rel_path in old_files:
+        if rel_path not in new_files:
+            dest_path = os.path.join(dest_dir_path, rel_path)
+            if verbose:
+                print(f" * removing {dest_path}")
+            remove_output(dest_path, dest_dir_path)
+
+    save_manifest(manifest_path, {"files": new_files})
+    return new_files
+
+
+def dest_state(stat):
+    # deduplicated files share one inode, which can only carry one source's
+    # mtime, so what was placed is recognised by its own stat instead
+    return {"inode": stat.st_ino, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def is_up_to_date(from_path, dest_path, stat, entry, old_entry, same_source):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != stat.st_size:
+        return False
+    digest = entry.get("sha256")
+    if "dest" in old_entry:
+        # the destination is still what the last sync placed, from a source
+        # with the same bytes
+        if old_entry["dest"] != dest_state(dest_stat):
+            return False
+        return same_source or (
+            digest is not None and old_entry.get("sha256") == digest
+        )
+    # without a record (e.g. after a full build copied the tree) copies are
+    # matched by the mtime copy2 preserved, or by content
+    if dest_stat.st_mtime_ns == stat.st_mtime_ns:
+        return True
+    if digest is not None and hash_file(dest_path) == digest:
+        shutil.copystat(from_path, dest_path)
+        return True
+    return False
+
+
+def place_file(from_path, dest_path, hardlink=False):
+    if hardlink and link_file(from_path, dest_path):
+        return
+    prepare_dest(dest_path)
+    if not reflink_file(from_path, dest_path):
+        shutil.copy2(from_path, dest_path)
+
+
+def link_file(from_path, dest_path):
+    prepare_dest(dest_path)
+    try:
+        os.link(from_path, dest_path)
+    except OSError:
+        return False
+    return True
+
+
+def reflink_file(from_path, dest_path):
+    if fcntl is None:
+        return False
+    try:
+        with open(from_path, "rb") as src, open(dest_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        return False
+    shutil.copystat(from_path, dest_path)
+    return True
+
 
+def prepare_dest(dest_path):
+    dest_dir_path = os.path.dirname(dest_path)
+    if dest_dir_path != "":
+        os.makedirs(dest_dir_path, exist_ok=True)
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
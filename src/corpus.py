@@ -0,0 +1,109 @@
+import argparse
+import os
+import random
+
+
+SHAPES = ("paragraphs", "links", "code", "lists", "deep")
+WORDS = (
+    "elf ring hobbit shire river mountain road forest song star lamp sword "
+    "tower gate bridge valley wizard king horse ship harbor stone"
+).split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def paragraph_block(rng, length):
+    lines = []
+    for i in range(length):
+        line = sentence(rng)
+        if i % 3 == 0:
+            line += f" with **{rng.choice(WORDS)}** and _{rng.choice(WORDS)}_"
+        if i % 4 == 1:
+            line += f" and `{rng.choice(WORDS)}()`"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def link_block(rng, length):
+    parts = []
+    for i in range(length):
+        word = rng.choice(WORDS)
+        if i % 2 == 0:
+            parts.append(f"see [{word}](/{word}/{i}) then")
+        else:
+            parts.append(f"![{word}](/images/{word}.png) and")
+    return " ".join(parts)
+
+
+def code_block(rng, length):
+    lines = [
+        f"    {rng.choice(WORDS)} = {i}  # _not_ **markdown**" for i in range(length)
+    ]
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+def list_block(rng, length, ordered):
+    if ordered:
+        return "\n".join(f"{i + 1}. {sentence(rng, 6)}" for i in range(length))
+    return "\n".join(
+        f"- {sentence(rng, 6)} _{rng.choice(WORDS)}_" for _ in range(length)
+    )
+
+
+def generate_page(rng, index, shape, size):
+    blocks = [f"# Page {index} {rng.choice(WORDS)}"]
+    for i in range(size):
+        if i % 7 == 3:
+            blocks.append(f"## Section {i}")
+        if shape == "paragraphs":
+            blocks.append(paragraph_block(rng, 12))
+        elif shape == "links":
+            blocks.append(link_block(rng, 40))
+        elif shape == "code":
+            blocks.append(code_block(rng, 60))
+        elif shape == "lists":
+            blocks.append(list_block(rng, 30, i % 2 == 0))
+        else:
+            blocks.append(paragraph_block(rng, 3))
+        if i % 5 == 0:
+            blocks.append(f"> {sentence(rng)}\n> {sentence(rng)}")
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_path(index, shape):
+    if shape == "deep":
+        parts = [f"level{(index >> shift) % 4}" for shift in range(0, 16, 2)]
+        return os.path.join(*parts, f"page{index}", "index.md")
+    return os.path.join(f"section{index % 10}", f"page{index}", "index.md")
+
+
+def generate_corpus(dest_dir_path, pages, shape="paragraphs", size=20, seed=0):
+    if shape not in SHAPES:
+        raise ValueError(f"invalid corpus shape: {shape}")
+    rng = random.Random(seed)
+    paths = []
+    for index in range(pages):
+        path = os.path.join(dest_dir_path, page_path(index, shape))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(generate_page(rng, index, shape, size))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic content tree.")
+    parser.add_argument("dest")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--shape", choices=SHAPES, default="paragraphs")
+    parser.add_argument("--size", type=int, default=20, help="blocks per page")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    paths = generate_corpus(args.dest, args.pages, args.shape, args.size, args.seed)
+    print(f"Wrote {len(paths)} pages to {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
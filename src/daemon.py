@@ -0,0 +1,64 @@
+import json
+import os
+import socket
+import socketserver
+
+from blockcache import BlockCache
+from buildclient import DEFAULT_SOCKET_PATH
+from sitebuild import build_site
+
+
+class BuildRequestHandler(socketserver.StreamRequestHandler):
+    # each request is one line of JSON naming the settings to change for
+    # that build; the reply is the BuildResult as one line of JSON
+    def handle(self):
+        for line in self.rfile:
+            try:
+                changes = json.loads(line) if line.strip() else {}
+                config = self.server.config.replace(**changes)
+            except (ValueError, TypeError) as e:
+                reply = {"ok": False, "error": f"invalid request: {e}"}
+            else:
+                try:
+                    reply = build_site(config, cache=self.server.cache).to_dict()
+                except Exception as e:
+                    # the reply must always be sent, or the client hangs up
+                    # with no reason given
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class BuildServer(socketserver.UnixStreamServer):
+    # requests are handled one at a time, so builds never overlap, and the
+    # block cache stays warm from one build to the next
+    def __init__(self, socket_path, config):
+        self.config = config
+        self.cache = BlockCache()
+        remove_stale_socket(socket_path)
+        super().__init__(socket_path, BuildRequestHandler)
+
+
+def remove_stale_socket(socket_path):
+    if not os.path.exists(socket_path):
+        os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(socket_path)
+            return
+    raise RuntimeError(f"a build daemon is already listening on {socket_path}")
+
+
+def serve_daemon(config, socket_path=DEFAULT_SOCKET_PATH):
+    server = BuildServer(socket_path, config)
+    print(f"Waiting for build requests on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
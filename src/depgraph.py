@@ -0,0 +1,112 @@
+import os
+
+from manifest import hash_file
+
+
+BASEPATH_NODE = "config:basepath"
+VERSION_NODE = "config:version"
+DRAFTS_NODE = "config:drafts"
+IMAGE_PREFIX = "image:"
+
+
+def image_node(url):
+    return IMAGE_PREFIX + url
+
+
+def is_virtual(node):
+    return node.startswith(("config:", IMAGE_PREFIX))
+
+
+class DependencyGraph:
+    # edges run from each output to the inputs its bytes depend on: files
+    # by absolute path, plus virtual nodes for build settings and image
+    # sizes. An output may itself be the input of another one
+    def __init__(self, edges=None):
+        self.dependencies = {}
+        self.dependents = {}
+        for output, inputs in (edges or {}).items():
+            self.add(output, inputs)
+
+    def __contains__(self, output):
+        return output in self.dependencies
+
+    def outputs(self):
+        return set(self.dependencies)
+
+    def inputs(self):
+        return set(self.dependents)
+
+    def add(self, output, inputs):
+        self.remove(output)
+        self.dependencies[output] = set(inputs)
+        for node in self.dependencies[output]:
+            self.dependents.setdefault(node, set()).add(output)
+
+    def remove(self, output):
+        for node in self.dependencies.pop(output, ()):
+            outputs = self.dependents[node]
+            outputs.discard(output)
+            if not outputs:
+                del self.dependents[node]
+
+    def affected(self, changed):
+        # every output reachable from the changed nodes
+        affected = set()
+        stack = list(changed)
+        while stack:
+            node = stack.pop()
+            for output in self.dependents.get(node, ()):
+                if output not in affected:
+                    affected.add(output)
+                    stack.append(output)
+        return affected
+
+    def to_dict(self):
+        return {
+            output: sorted(inputs)
+            for output, inputs in sorted(self.dependencies.items())
+        }
+
+
+def fingerprint_inputs(nodes, previous=None, values=None):
+    # virtual nodes take their fingerprint from values; files are rehashed
+    # only when their size or mtime differs from the previous fingerprint
+    previous = previous or {}
+    values = values or {}
+    fingerprints = {}
+    for node in sorted(nodes):
+        if node in values:
+            fingerprints[node] = values[node]
+            continue
+        try:
+            stat = os.stat(node)
+        except FileNotFoundError:
+            fingerprints[node] = None
+            continue
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        old_entry = previous.get(node)
+        if (
+            isinstance(old_entry, dict)
+            and old_entry.get("size") == entry["size"]
+            and old_entry.get("mtime") == entry["mtime"]
+        ):
+            entry["sha256"] = old_entry["sha256"]
+        else:
+            entry["sha256"] = hash_file(node)
+        fingerprints[node] = entry
+    return fingerprints
+
+
+def digest(fingerprint):
+    if isinstance(fingerprint, dict):
+        return fingerprint["sha256"]
+    return fingerprint
+
+
+def changed_inputs(old, new):
+    # a file whose mtime moved but whose bytes did not is unchanged
+    return {
+        node
+        for node, fingerprint in new.items()
+        if node not in old or digest(old[node]) != digest(fingerprint)
+    }
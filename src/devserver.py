@@ -0,0 +1,157 @@
+import http.server
+import os
+import threading
+import time
+from functools import partial
+
+from blockcache import BlockCache
+from sitebuild import build_site
+
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = (
+    f'<script>new EventSource("{RELOAD_PATH}").onmessage = '
+    "function () { location.reload(); };</script>"
+)
+
+
+def snapshot(paths):
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            state[os.path.normpath(path)] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                file_path = os.path.normpath(os.path.join(dirpath, filename))
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                state[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+def diff_snapshots(old, new):
+    paths = old.keys() | new.keys()
+    return {path for path in paths if old.get(path) != new.get(path)}
+
+
+def inject_reload_script(html):
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + RELOAD_SCRIPT
+    return html[:index] + RELOAD_SCRIPT + html[index:]
+
+
+class SiteBuilder:
+    # rebuilds with the command line's settings, always incrementally, so
+    # listings, the search index and compressed files stay current too
+    def __init__(self, config):
+        self.config = config.replace(incremental=True)
+        self.dir_path_public = config.public
+        self.cache = BlockCache()
+        self.generation = 0
+        self.changed = threading.Condition()
+
+    def watched_paths(self):
+        return [self.config.content, self.config.static, self.config.template]
+
+    def rebuild(self, changed_paths):
+        # the dependency graph in the incremental manifest decides which
+        # pages the changes reach, including image size changes; only the
+        # changed files are fingerprinted again
+        changed = {os.path.abspath(path) for path in changed_paths}
+        result = build_site(self.config, cache=self.cache, changed=changed)
+        if not result.ok:
+            print(f"Error: {result.message}")
+
+        with self.changed:
+            self.generation += 1
+            self.changed.notify_all()
+        print(f"Rebuilt in {result.seconds * 1000:.1f} ms")
+
+    def wait_for_change(self, generation, timeout):
+        with self.changed:
+            self.changed.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+class LiveReloadHandler(http.server.SimpleHTTPRequestHandler):
+    def __init__(self, *args, builder=None, **kwargs):
+        self.builder = builder
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == RELOAD_PATH:
+            self.send_reload_events()
+            return
+        file_path = self.translate_path(self.path)
+        if os.path.isdir(file_path) and path.endswith("/"):
+            file_path = os.path.join(file_path, "index.html")
+        if file_path.endswith(".html") and os.path.isfile(file_path):
+            self.send_html(file_path)
+            return
+        super().do_GET()
+
+    def send_html(self, file_path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            body = inject_reload_script(f.read()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_reload_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        generation = self.builder.generation
+        try:
+            while True:
+                current = self.builder.wait_for_change(generation, 15)
+                if current != generation:
+                    self.wfile.write(b"data: reload\n\n")
+                    generation = current
+                else:
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, format, *args):
+        if self.path != RELOAD_PATH:
+            super().log_message(format, *args)
+
+
+def watch(builder, interval=0.05):
+    state = snapshot(builder.watched_paths())
+    while True:
+        time.sleep(interval)
+        new_state = snapshot(builder.watched_paths())
+        changed_paths = diff_snapshots(state, new_state)
+        state = new_state
+        if changed_paths:
+            builder.rebuild(changed_paths)
+
+
+def serve(builder, port=8888, interval=0.05):
+    handler = partial(
+        LiveReloadHandler, builder=builder, directory=builder.dir_path_public
+    )
+    server = http.server.ThreadingHTTPServer(("", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {builder.dir_path_public} at http://localhost:{port}/")
+    try:
+        watch(builder, interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
@@ -0,0 +1,67 @@
+import datetime
+
+
+FRONT_MATTER_DELIMITER = "---"
+TRUE_VALUES = ("true", "yes", "1")
+FALSE_VALUES = ("false", "no", "0", "")
+
+
+def is_front_matter(block):
+    # front matter is the first block of a page, fenced by --- lines and
+    # written without blank lines so it stays a single block
+    return block.startswith(FRONT_MATTER_DELIMITER + "\n") and block.endswith(
+        "\n" + FRONT_MATTER_DELIMITER
+    )
+
+
+def parse_front_matter(block):
+    meta = {}
+    for line in block.split("\n")[1:-1]:
+        if line.strip() == "":
+            continue
+        key, separator, value = line.partition(":")
+        if separator == "":
+            raise ValueError(f"invalid front matter line: {line}")
+        key = key.strip().lower()
+        value = unquote(value.strip())
+        if key == "date":
+            meta[key] = parse_date(value)
+        elif key == "tags":
+            meta[key] = parse_tags(value)
+        elif key == "draft":
+            meta[key] = parse_bool(value)
+        else:
+            meta[key] = value
+    return meta
+
+
+def unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"invalid front matter date: {value}") from None
+
+
+def parse_tags(value):
+    if value.startswith("[") and value.endswith("]"):
+        value = value[1:-1]
+    tags = []
+    for tag in value.split(","):
+        tag = unquote(tag.strip())
+        if tag != "" and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def parse_bool(value):
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ValueError(f"invalid front matter boolean: {value}")
@@ -1,48 +1,545 @@
+import contextlib
 import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from markdown_blocks import markdown_to_html_node
+from buildreport import phase
+from depgraph import (
+    BASEPATH_NODE,
+    DRAFTS_NODE,
+    IMAGE_PREFIX,
+    VERSION_NODE,
+    DependencyGraph,
+    changed_inputs,
+    digest,
+    fingerprint_inputs,
+    image_node,
+    is_virtual,
+)
+from linkcheck import extract_links
+from markdown_blocks import iter_lines, markdown_to_page
+from output import AtomicFile
+from pipeline import BackgroundWriter, open_mapped, prefetch
+from search import page_postings
+from shard import select_shard
+from manifest import hash_bytes, load_manifest, remove_output, save_manifest
+from template import load_template
+from toc import render_toc
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
+GENERATOR_VERSION = "5"
+MANIFEST_FILENAME = ".manifest.json"
+
+
+class PageBuildError(Exception):
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(f"{len(failures)} page(s) failed to build")
+
+
+def find_pages(dir_path_content, dest_dir_path):
+    pages = []
     for filename in os.listdir(dir_path_content):
         from_path = os.path.join(dir_path_content, filename)
         dest_path = os.path.join(dest_dir_path, filename)
         if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, basepath)
+            pages.append((from_path, Path(dest_path).with_suffix(".html")))
         else:
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+            pages.extend(find_pages(from_path, dest_path))
+    return pages
+
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    *,
+    jobs=1,
+    report=None,
+    verbose=True,
+    parse_cache=None,
+    link_index=None,
+    io_depth=0,
+    images=None,
+    site_index=None,
+    search_index=None,
+    cache=None,
+    shard=None,
+    drafts=False,
+):
+    with phase(report, "walk"):
+        pages = find_pages(dir_path_content, dest_dir_path)
+        if shard is not None:
+            pages = select_shard(pages, dir_path_content, shard)
+    generate_pages(
+        pages,
+        template_path,
+        basepath,
+        jobs=jobs,
+        report=report,
+        verbose=verbose,
+        cache=cache,
+        parse_cache=parse_cache,
+        link_index=link_index,
+        io_depth=io_depth,
+        images=images,
+        site_index=site_index,
+        search_index=search_index,
+        drafts=drafts,
+    )
+
+
+def generate_pages(
+    pages,
+    template_path,
+    basepath,
+    *,
+    jobs=1,
+    report=None,
+    verbose=True,
+    cache=None,
+    parse_cache=None,
+    link_index=None,
+    io_depth=0,
+    images=None,
+    site_index=None,
+    search_index=None,
+    graph=None,
+    drafts=False,
+):
+    if jobs is None or jobs < 1:
+        jobs = os.cpu_count() or 1
+    if not pages:
+        return
+    with phase(report, "template"):
+        template = load_template(template_path, basepath, images)
+    search_keys = None
+    if search_index is not None:
+        search_keys = search_index.known_keys()
+    # the settings every page renders with, passed to generate_page by name
+    options = {
+        "basepath": basepath,
+        "template": template,
+        "cache": cache,
+        "parse_cache": parse_cache,
+        "collect_links": link_index is not None,
+        "search_keys": search_keys,
+        "drafts": drafts,
+    }
+    if io_depth > 0 and (jobs == 1 or len(pages) < 2):
+        results = iter_page_results_async(pages, template_path, options, io_depth)
+    else:
+        results = iter_page_results(pages, template_path, options, jobs)
+    failures = []
+    for (from_path, dest_path), stats, error in results:
+        if verbose:
+            print(f" * {from_path} {template_path} -> {dest_path}")
+        if error is not None:
+            failures.append((from_path, error))
+            # a background write can fail after its page was reported built,
+            # so whatever was recorded for it is dropped and it builds again
+            for index in (link_index, site_index, search_index):
+                if index is not None:
+                    index.remove(dest_path)
+            if graph is not None:
+                graph.remove(os.path.abspath(dest_path))
+            continue
+        if graph is not None:
+            graph.add(
+                os.path.abspath(dest_path),
+                page_dependencies(from_path, template_path, stats["meta"]),
+            )
+        if report is not None:
+            report.add_page(stats)
+        if link_index is not None:
+            link_index.add(dest_path, from_path, stats["links"])
+        if site_index is not None:
+            site_index.add(dest_path, from_path, stats["meta"])
+        if search_index is not None:
+            key, postings = stats["search"]
+            search_index.add(dest_path, stats["meta"], key, postings)
+    if failures:
+        for from_path, e in failures:
+            print(f" ! {from_path}: {e}")
+        raise PageBuildError(failures)
+
+
+def iter_page_results(pages, template_path, options, jobs):
+    if jobs == 1 or len(pages) < 2:
+        for from_path, dest_path in pages:
+            try:
+                stats = generate_page(from_path, template_path, dest_path, **options)
+            except Exception as e:
+                yield (from_path, dest_path), None, e
+                continue
+            yield (from_path, dest_path), stats, None
+        return
+
+    # the block cache only lives in this process, so workers render without it
+    options = {**options, "cache": None}
+    with ProcessPoolExecutor(max_workers=min(jobs, len(pages))) as executor:
+        futures = [
+            executor.submit(
+                generate_page, from_path, template_path, dest_path, **options
+            )
+            for from_path, dest_path in pages
+        ]
+        for page, future in zip(pages, futures):
+            try:
+                stats = future.result()
+            except Exception as e:
+                yield page, None, e
+                continue
+            yield page, stats, None
+
+
+def iter_page_results_async(pages, template_path, options, io_depth):
+    # overlaps reading upcoming sources and writing finished pages with
+    # parsing, keeping at most io_depth files queued on either side
+    writer = BackgroundWriter(io_depth)
+    try:
+        reads = prefetch([from_path for from_path, _ in pages], depth=io_depth)
+        for (from_path, dest_path), read in zip(pages, reads):
+            try:
+                stats = generate_page(
+                    from_path,
+                    template_path,
+                    dest_path,
+                    markdown_content=read.result(),
+                    writer=writer,
+                    **options,
+                )
+            except Exception as e:
+                yield (from_path, dest_path), None, e
+                continue
+            yield (from_path, dest_path), stats, None
+    finally:
+        errors = writer.close()
+    sources = {str(dest_path): from_path for from_path, dest_path in pages}
+    for dest_path, e in errors:
+        yield (sources[str(dest_path)], dest_path), None, e
+
+
+def generate_pages_incremental(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    *,
+    jobs=1,
+    report=None,
+    verbose=True,
+    parse_cache=None,
+    link_index=None,
+    io_depth=0,
+    images=None,
+    site_index=None,
+    search_index=None,
+    cache=None,
+    drafts=False,
+    changed=None,
+):
+    manifest_path = os.path.join(dest_dir_path, MANIFEST_FILENAME)
+    manifest = load_manifest(manifest_path)
+    # outputs and file inputs are recorded relative to the destination, so the
+    # manifest means the same thing from any working directory and survives
+    # moving the whole tree
+    dest_root = os.path.abspath(dest_dir_path)
+    graph = DependencyGraph(
+        {
+            os.path.join(dest_root, rel_path): [
+                node_from_manifest(node, dest_root) for node in inputs
+            ]
+            for rel_path, inputs in manifest.get("graph", {}).items()
+        }
+    )
+    old_inputs = {
+        node_from_manifest(node, dest_root): fingerprint
+        for node, fingerprint in manifest.get("inputs", {}).items()
+    }
+    old_links = manifest.get("links", {})
+    old_meta = manifest.get("meta", {})
+    search_keys = None
+    if search_index is not None:
+        search_keys = search_index.known_keys()
+
+    # only pages reachable from an input whose fingerprint changed are
+    # rebuilt, plus pages without edges, which were never built. Given the
+    # absolute paths of the changed files (the dev server's watcher knows
+    # them), other files keep their recorded fingerprints without a stat
+    nodes = graph.inputs()
+    if changed is not None:
+        nodes = {
+            node
+            for node in nodes
+            if is_virtual(node) or node in changed or node not in old_inputs
+        }
+    values = input_values(nodes, basepath, images, drafts)
+    inputs = {**old_inputs, **fingerprint_inputs(nodes, old_inputs, values)}
+    affected = graph.affected(changed_inputs(old_inputs, inputs))
 
+    new_pages = set()
+    stale_pages = []
+    with phase(report, "walk"):
+        pages = find_pages(dir_path_content, dest_dir_path)
+    for from_path, dest_path in pages:
+        rel_path = os.path.relpath(dest_path, dest_dir_path)
+        output = os.path.abspath(dest_path)
+        new_pages.add(output)
+        # an output whose recorded edges miss its current source (say, docs/
+        # restored alone into another checkout) is simply rebuilt
+        source = os.path.abspath(from_path)
+        recorded = output in graph and source in graph.dependencies[output]
+        key = None
+        if recorded:
+            key = digest(inputs[source])
+        # a draft left out of the site has no output to find
+        written = os.path.exists(dest_path) or (
+            not drafts and old_meta.get(rel_path, {}).get("draft")
+        )
+        if (
+            recorded
+            and output not in affected
+            and written
+            and (link_index is None or rel_path in old_links)
+            and (site_index is None or rel_path in old_meta)
+            and (search_index is None or key in search_keys)
+        ):
+            if link_index is not None:
+                link_index.add(dest_path, from_path, old_links[rel_path])
+            if site_index is not None:
+                site_index.add(dest_path, from_path, old_meta[rel_path])
+            if search_index is not None:
+                search_index.add(dest_path, old_meta[rel_path], key)
+            continue
+        stale_pages.append((from_path, dest_path))
+        # edges come back once the page builds, so a page that fails or is
+        # interrupted is rebuilt next time
+        graph.remove(output)
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f" * {from_path} {template_path} -> {dest_path}")
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
+    for output in graph.outputs() - new_pages:
+        if verbose:
+            print(f" * removing {output}")
+        remove_output(output, dest_dir_path)
+        graph.remove(output)
+
+    try:
+        generate_pages(
+            stale_pages,
+            template_path,
+            basepath,
+            jobs=jobs,
+            report=report,
+            verbose=verbose,
+            cache=cache,
+            parse_cache=parse_cache,
+            link_index=link_index,
+            io_depth=io_depth,
+            images=images,
+            site_index=site_index,
+            search_index=search_index,
+            graph=graph,
+            drafts=drafts,
+        )
+    finally:
+        # files are recorded as they were before the pages were read, so one
+        # edited during the build is seen as changed next time; only inputs
+        # new to the graph are fingerprinted now
+        nodes = graph.inputs()
+        fresh = {node for node in nodes if is_virtual(node) or node not in inputs}
+        fingerprints = {node: inputs[node] for node in nodes - fresh}
+        fingerprints.update(
+            fingerprint_inputs(
+                fresh, inputs, input_values(fresh, basepath, images, drafts)
+            )
+        )
+        manifest = {
+            "version": GENERATOR_VERSION,
+            "graph": {
+                os.path.relpath(output, dest_root): sorted(
+                    node_to_manifest(node, dest_root) for node in inputs
+                )
+                for output, inputs in graph.to_dict().items()
+            },
+            "inputs": {
+                node_to_manifest(node, dest_root): fingerprint
+                for node, fingerprint in fingerprints.items()
+            },
+        }
+        if link_index is not None:
+            manifest["links"] = {}
+            for output in sorted(new_pages):
+                links = link_index.links_for(output)
+                if links is not None:
+                    rel_path = os.path.relpath(output, dest_dir_path)
+                    manifest["links"][rel_path] = links
+        if site_index is not None:
+            manifest["meta"] = {}
+            for output in sorted(new_pages):
+                meta = site_index.meta_for(output)
+                if meta is not None:
+                    rel_path = os.path.relpath(output, dest_dir_path)
+                    manifest["meta"][rel_path] = meta
+        save_manifest(manifest_path, manifest)
+
+
+def node_to_manifest(node, dest_root):
+    if is_virtual(node):
+        return node
+    return os.path.relpath(node, dest_root)
+
+
+def node_from_manifest(node, dest_root):
+    if is_virtual(node):
+        return node
+    return os.path.normpath(os.path.join(dest_root, node))
+
+
+def page_dependencies(from_path, template_path, meta):
+    # a page's bytes depend on its source, the template, the build settings
+    # and the size of every image it shows; whether a draft is written at
+    # all depends on --drafts
+    nodes = {
+        os.path.abspath(from_path),
+        os.path.abspath(template_path),
+        BASEPATH_NODE,
+        VERSION_NODE,
+    }
+    if meta.get("draft"):
+        nodes.add(DRAFTS_NODE)
+    nodes.update(image_node(url) for url in meta.get("images", []))
+    return nodes
+
+
+def input_values(nodes, basepath, images, drafts=False):
+    values = {
+        BASEPATH_NODE: basepath,
+        VERSION_NODE: GENERATOR_VERSION,
+        DRAFTS_NODE: drafts,
+    }
+    for node in nodes:
+        if node.startswith(IMAGE_PREFIX):
+            size = (images or {}).get(node[len(IMAGE_PREFIX) :])
+            values[node] = None if size is None else list(size)
+    return values
+
+
+def generate_page(
+    from_path,
+    template_path,
+    dest_path,
+    basepath,
+    *,
+    template=None,
+    cache=None,
+    parse_cache=None,
+    collect_links=False,
+    markdown_content=None,
+    writer=None,
+    search_keys=None,
+    drafts=False,
+):
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        allocated_before = tracemalloc.get_traced_memory()[0]
+    # without prefetched text the source is memory-mapped and decoded block by
+    # block, so "read" only covers mapping it and the faults land in "parse"
+    if markdown_content is None:
+        source = open_mapped(from_path)
+    else:
+        source = contextlib.nullcontext(markdown_content)
+    with source as markdown:
+        read_done = time.perf_counter()
+        size = len(markdown)
+
+        if template is None:
+            template = load_template(template_path, basepath)
+
+        # postings are cached by content hash; a page whose hash is unknown
+        # is parsed (even on a parse cache hit) to collect its text
+        plain_text = None
+        search_key = None
+        if search_keys is not None:
+            search_key = hash_bytes(encode_source(markdown))
+            if search_key not in search_keys:
+                plain_text = []
+
+        cached = None
+        if parse_cache is not None:
+            key = parse_cache.key(markdown)
+            if plain_text is None:
+                cached = parse_cache.get(key)
+        if cached is not None:
+            title, content, meta = cached
+        else:
+            meta, content = markdown_to_page(markdown, cache, plain_text)
+            title = meta.get("title")
+            if title is None:
+                raise ValueError("no title found")
+            if parse_cache is not None or collect_links:
+                content = content.to_html()
+            if parse_cache is not None:
+                parse_cache.put(key, title, content, meta)
+    toc = render_toc(meta.get("outline", []))
+    parse_done = time.perf_counter()
 
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
+    hidden = meta.get("draft") and not drafts
+    if hidden:
+        # a draft is still parsed for the manifests but never published, and
+        # a copy written before it became one is taken down
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(dest_path)
+        render_done = time.perf_counter()
+    elif writer is not None:
+        page = template.render(Title=title, Content=content, TOC=toc)
+        render_done = time.perf_counter()
+        writer.write(dest_path, page)
+    else:
+        with AtomicFile(dest_path) as to_file:
+            template.write(to_file, Title=title, Content=content, TOC=toc)
+            render_done = time.perf_counter()
+    end = time.perf_counter()
 
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
+    # serialization, template assembly and buffered writes are streamed
+    # together, so "render" covers all three and "write" is the final flush
+    # (or, with a background writer, handing the page to its queue)
+    stats = {
+        "source": from_path,
+        "dest": str(dest_path),
+        "bytes": size,
+        "cached": cached is not None,
+        "meta": meta,
+        "read": read_done - start,
+        "parse": parse_done - read_done,
+        "render": render_done - parse_done,
+        "write": end - render_done,
+        "wall": end - start,
+        "cpu": time.process_time() - cpu_start,
+    }
+    if collect_links:
+        stats["links"] = [] if hidden else extract_links(content)
+    if search_keys is not None:
+        postings = None
+        if plain_text is not None:
+            postings = page_postings(title, plain_text)
+        stats["search"] = (search_key, postings)
+    if tracing:
+        stats["allocated"] = tracemalloc.get_traced_memory()[0] - allocated_before
+    return stats
 
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    template = template.replace('href="/', 'href="' + basepath)
-    template = template.replace('src="/', 'src="' + basepath)
 
-    dest_dir_path = os.path.dirname(dest_path)
-    if dest_dir_path != "":
-        os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
+def encode_source(markdown):
+    if isinstance(markdown, str):
+        return markdown.encode("utf-8")
+    return markdown
 
 
 def extract_title(md):
-    lines = md.split("\n")
-    for line in lines:
+    for line in iter_lines(md):
         if line.startswith("# "):
             return line[2:]
     raise ValueError("no title found")
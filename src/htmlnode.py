@@ -1,4 +1,9 @@
+import io
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -6,23 +11,41 @@ class HTMLNode:
         self.props = props
 
     def to_html(self):
+        stream = io.StringIO()
+        self.write_html(stream)
+        return stream.getvalue()
+
+    def write_html(self, stream):
         raise NotImplementedError("to_html method not implemented")
 
     def props_to_html(self):
         if self.props is None:
             return ""
-        props_html = ""
-        for prop in self.props:
-            props_html += f' {prop}="{self.props[prop]}"'
-        return props_html
+        return "".join(f' {prop}="{value}"' for prop, value in self.props.items())
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    # leaves are immutable so one instance can be shared between trees
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
-        super().__init__(tag, value, None, props)
+        object.__setattr__(self, "tag", tag)
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "children", None)
+        object.__setattr__(self, "props", props)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LeafNode is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("LeafNode is immutable")
+
+    def __reduce__(self):
+        # pickle and copy would otherwise restore the slots through setattr
+        return (LeafNode, (self.tag, self.value, self.props))
 
     def to_html(self):
         if self.value is None:
@@ -31,24 +54,28 @@ class LeafNode(HTMLNode):
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def write_html(self, stream):
+        stream.write(self.to_html())
+
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def write_html(self, stream):
         if self.tag is None:
             raise ValueError("invalid HTML: no tag")
         if self.children is None:
             raise ValueError("invalid HTML: no children")
-        children_html = ""
+        stream.write(f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            child.write_html(stream)
+        stream.write(f"</{self.tag}>")
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
-
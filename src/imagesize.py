@@ -0,0 +1,103 @@
+import mmap
+import os
+import struct
+
+from copystatic import find_static_files
+from manifest import load_manifest, save_manifest
+
+
+IMAGE_MANIFEST_FILENAME = ".image-manifest.json"
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+# start-of-frame markers; C4, C8 and CC share the range but are not frames
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def read_image_size(path):
+    # maps the file so only the pages holding the header are read; a
+    # truncated or corrupt header gives None rather than failing the build
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                return parse_image_size(data)
+            except (struct.error, IndexError):
+                return None
+
+
+def parse_image_size(data):
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and data[12:16] == b"IHDR":
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", data[6:10])
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return parse_webp_size(data)
+    if data[:2] == b"\xff\xd8":
+        return parse_jpeg_size(data)
+    return None
+
+
+def parse_webp_size(data):
+    chunk = data[12:16]
+    if chunk == b"VP8 " and data[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and data[20:21] == b"\x2f":
+        bits = struct.unpack("<I", data[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def parse_jpeg_size(data):
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            pos += 2
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[pos + 5 : pos + 9])
+            return width, height
+        pos += 2 + struct.unpack(">H", data[pos + 2 : pos + 4])[0]
+    return None
+
+
+def index_images(dir_path_static, dest_dir_path):
+    # maps root-relative image URLs to (width, height); headers are only
+    # read again for files whose size or mtime changed since the last build
+    manifest_path = os.path.join(dest_dir_path, IMAGE_MANIFEST_FILENAME)
+    old_files = load_manifest(manifest_path).get("files", {})
+    new_files = {}
+    images = {}
+    for rel_path in find_static_files(dir_path_static):
+        if not rel_path.lower().endswith(IMAGE_SUFFIXES):
+            continue
+        path = os.path.join(dir_path_static, rel_path)
+        stat = os.stat(path)
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        old_entry = old_files.get(rel_path, {})
+        if (
+            old_entry.get("size") == entry["size"]
+            and old_entry.get("mtime") == entry["mtime"]
+            and "dimensions" in old_entry
+        ):
+            entry["dimensions"] = old_entry["dimensions"]
+        else:
+            size = read_image_size(path)
+            entry["dimensions"] = None if size is None else list(size)
+        new_files[rel_path] = entry
+        if entry["dimensions"] is not None:
+            url = "/" + rel_path.replace(os.sep, "/")
+            images[url] = tuple(entry["dimensions"])
+    if new_files != old_files:
+        save_manifest(manifest_path, {"files": new_files})
+    return images
@@ -3,7 +3,65 @@ import re
 from textnode import TextNode, TextType
 
 
+DELIMITER_PATTERN = re.compile(r"\*\*|_|`")
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+DELIMITER_TYPES = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+
 def text_to_textnodes(text):
+    nodes = []
+    open_type = None
+    start = 0
+    for match in DELIMITER_PATTERN.finditer(text):
+        text_type = DELIMITER_TYPES[match.group()]
+        if open_type is None:
+            append_text_nodes(nodes, text[start : match.start()])
+            open_type = text_type
+        elif open_type == text_type:
+            if match.start() > start:
+                nodes.append(TextNode(text[start : match.start()], text_type))
+            open_type = None
+        elif open_type == TextType.BOLD or (
+            open_type == TextType.ITALIC and text_type == TextType.CODE
+        ):
+            # bold is split out before italic, and italic before code, so
+            # weaker delimiters inside them are literal text
+            continue
+        else:
+            raise ValueError("invalid markdown, formatted section not closed")
+        start = match.end()
+    if open_type is not None:
+        raise ValueError("invalid markdown, formatted section not closed")
+    append_text_nodes(nodes, text[start:])
+    return nodes
+
+
+def append_text_nodes(nodes, text):
+    pos = 0
+    for match in IMAGE_PATTERN.finditer(text):
+        append_link_nodes(nodes, text[pos : match.start()])
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        pos = match.end()
+    append_link_nodes(nodes, text[pos:])
+
+
+def append_link_nodes(nodes, text):
+    pos = 0
+    for match in LINK_PATTERN.finditer(text):
+        if match.start() > pos:
+            nodes.append(TextNode(text[pos : match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+        pos = match.end()
+    if pos < len(text):
+        nodes.append(TextNode(text[pos:], TextType.TEXT))
+
+
+def text_to_textnodes_multipass(text):
     nodes = [TextNode(text, TextType.TEXT)]
     nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
     nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
@@ -89,13 +147,11 @@ def split_nodes_link(old_nodes):
 
 
 def extract_markdown_images(text):
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
+    matches = IMAGE_PATTERN.findall(text)
     return matches
 
 
 def extract_markdown_links(text):
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
+    matches = LINK_PATTERN.findall(text)
     return matches
 
@@ -0,0 +1,116 @@
+import os
+import posixpath
+import re
+from urllib.parse import unquote
+
+
+URL_ATTRIBUTE_PATTERN = re.compile(r' (?:href|src)="([^"]*)"')
+EXTERNAL_URL_PATTERN = re.compile(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//|#)")
+
+
+def extract_links(html):
+    return URL_ATTRIBUTE_PATTERN.findall(html)
+
+
+def is_internal(url):
+    return url != "" and not EXTERNAL_URL_PATTERN.match(url)
+
+
+def link_targets(page_path, url):
+    path = unquote(url.split("#", 1)[0].split("?", 1)[0])
+    if path.startswith("/"):
+        path = path[1:]
+    else:
+        path = posixpath.join(posixpath.dirname(page_path), path)
+    trailing_slash = path == "" or path.endswith("/")
+    path = posixpath.normpath(path)
+    if path == ".":
+        path = ""
+    if trailing_slash:
+        return [posixpath.join(path, "index.html")]
+    return [path, posixpath.join(path, "index.html"), path + ".html"]
+
+
+def find_output_files(dest_dir_path):
+    files = set()
+    for dirpath, _, filenames in os.walk(dest_dir_path):
+        rel_dir_path = os.path.relpath(dirpath, dest_dir_path)
+        for filename in filenames:
+            rel_path = os.path.normpath(os.path.join(rel_dir_path, filename))
+            files.add(rel_path.replace(os.sep, "/"))
+    return files
+
+
+def find_line(source_path, url):
+    try:
+        with open(source_path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if f"]({url})" in line or f'"{url}"' in line:
+                    return number
+    except OSError:
+        pass
+    return None
+
+
+class BrokenLinksError(Exception):
+    def __init__(self, broken):
+        self.broken = broken
+        super().__init__(f"{len(broken)} broken internal link(s)")
+
+
+class BrokenLink:
+    def __init__(self, page, source, url, line=None):
+        self.page = page
+        self.source = source
+        self.url = url
+        self.line = line
+
+    def __eq__(self, other):
+        return (self.page, self.source, self.url, self.line) == (
+            other.page,
+            other.source,
+            other.url,
+            other.line,
+        )
+
+    def __str__(self):
+        location = self.source if self.line is None else f"{self.source}:{self.line}"
+        return f"{location}: broken link {self.url} (in {self.page})"
+
+    def __repr__(self):
+        return f"BrokenLink({self.page}, {self.source}, {self.url}, {self.line})"
+
+
+class LinkIndex:
+    def __init__(self, dest_dir_path):
+        self.dest_dir_path = dest_dir_path
+        self.pages = {}
+
+    def page_path(self, dest_path):
+        rel_path = os.path.relpath(dest_path, self.dest_dir_path)
+        return rel_path.replace(os.sep, "/")
+
+    def add(self, dest_path, source, links):
+        self.pages[self.page_path(dest_path)] = (source, links)
+
+    def remove(self, dest_path):
+        self.pages.pop(self.page_path(dest_path), None)
+
+    def links_for(self, dest_path):
+        page = self.pages.get(self.page_path(dest_path))
+        if page is None:
+            return None
+        return page[1]
+
+    def check(self, known_paths=None):
+        if known_paths is None:
+            known_paths = find_output_files(self.dest_dir_path)
+        broken = []
+        for page, (source, links) in sorted(self.pages.items()):
+            for url in links:
+                if not is_internal(url):
+                    continue
+                if any(target in known_paths for target in link_targets(page, url)):
+                    continue
+                broken.append(BrokenLink(page, source, url, find_line(source, url)))
+        return broken
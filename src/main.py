@@ -1,33 +1,212 @@
-import os
-import shutil
+import argparse
+import cProfile
 import sys
+import tracemalloc
 
-from copystatic import copy_files_recursive
-from gencontent import generate_pages_recursive
+from buildclient import DEFAULT_SOCKET_PATH
+from buildreport import BuildReport
+from compress import available_encoders
+from daemon import serve_daemon
+from devserver import SiteBuilder, serve
+from parsecache import DEFAULT_CACHE_PATH
+from pipeline import DEFAULT_DEPTH
+from shard import SHARDS_DIR, parse_shard, shard_dir
+from sitebuild import BuildConfig, build_site, merge_shards
 
 
-dir_path_static = "./static"
-dir_path_public = "./docs"
-dir_path_content = "./content"
-template_path = "./template.html"
-default_basepath = "/"
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep the public directory and only regenerate pages whose inputs changed",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="with --incremental, compare static files by content hash and "
+        "hardlink identical files together",
+    )
+    parser.add_argument(
+        "--hardlink",
+        action="store_true",
+        help="with --incremental, hardlink static files instead of copying them",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes for page generation (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="serve the public directory, rebuilding and reloading the browser "
+        "when content, static files or the template change",
+    )
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="don't print every file"
+    )
+    parser.add_argument(
+        "--report", metavar="PATH", help="write a JSON report of build timings"
+    )
+    parser.add_argument(
+        "--profile", metavar="PATH", help="write cProfile stats for the build"
+    )
+    parser.add_argument(
+        "--trace-allocations",
+        action="store_true",
+        help="record memory allocations per phase with tracemalloc",
+    )
+    parser.add_argument(
+        "--parse-cache",
+        nargs="?",
+        const=DEFAULT_CACHE_PATH,
+        metavar="PATH",
+        help="reuse rendered pages from a persistent cache keyed by content hash "
+        f"(default path: {DEFAULT_CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="fail the build if a page links to a file that was not generated",
+    )
+    parser.add_argument(
+        "--async-io",
+        nargs="?",
+        type=int,
+        const=DEFAULT_DEPTH,
+        default=0,
+        metavar="DEPTH",
+        help="read upcoming sources and write finished pages on background "
+        f"threads, keeping at most DEPTH files queued (default {DEFAULT_DEPTH})",
+    )
+    parser.add_argument(
+        "--deploy-diff",
+        metavar="PATH",
+        help="write the files added, changed and removed since the previous "
+        "build as JSON",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write precompressed siblings of HTML and text assets "
+        f"({', '.join(available_encoders())})",
+    )
+    parser.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="absolute URL the site is served from; enables sitemap.xml and "
+        "feed.xml",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="write a sharded client-side search index to search-index/",
+    )
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="also write pages marked draft: true (listings still leave them out)",
+    )
+    parser.add_argument(
+        "--daemon",
+        nargs="?",
+        const=DEFAULT_SOCKET_PATH,
+        metavar="SOCKET",
+        help="stay running with warm caches and build on requests sent to a "
+        f"Unix socket (default path: {DEFAULT_SOCKET_PATH})",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="render only shard I of N of the content, partitioned by a stable "
+        f"hash of the source path, into {SHARDS_DIR}/I-of-N",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        nargs="+",
+        metavar="DIR",
+        help="combine the outputs of every shard build into the public "
+        "directory, failing on colliding files, then finish the site",
+    )
+    args = parser.parse_args(argv)
+    if args.shard is not None and (
+        args.incremental or args.serve or args.merge_shards or args.daemon
+    ):
+        parser.error("--shard builds are full builds of one shard")
+    if args.serve:
+        args.incremental = True
+    return args
 
-def main():
 
-    basepath = default_basepath
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+def config_from_args(args):
+    public = BuildConfig().public
+    if args.shard is not None:
+        public = shard_dir(*args.shard)
+    return BuildConfig(
+        basepath=args.basepath,
+        public=public,
+        incremental=args.incremental,
+        checksum=args.checksum,
+        hardlink=args.hardlink,
+        jobs=args.jobs,
+        verbose=not args.quiet,
+        parse_cache=args.parse_cache,
+        check_links=args.check_links,
+        async_io=args.async_io,
+        deploy_diff=args.deploy_diff,
+        compress=args.compress,
+        site_url=args.site_url,
+        search=args.search,
+        shard=args.shard,
+        drafts=args.drafts,
+    )
+
 
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
+def main():
+    args = parse_args()
+    config = config_from_args(args)
+    if args.daemon:
+        serve_daemon(config, args.daemon)
+        return
 
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
+    report = None
+    if args.report or args.trace_allocations:
+        report = BuildReport()
+    if args.trace_allocations:
+        tracemalloc.start()
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
 
-    print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath)
+    try:
+        if args.merge_shards:
+            result = merge_shards(config, args.merge_shards, report)
+        else:
+            result = build_site(config, report)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        if report is not None:
+            print(report.summary())
+            if args.report:
+                report.write(args.report)
 
+    if not result.ok:
+        print(f"Error: {result.message}")
+    if args.serve:
+        builder = SiteBuilder(config)
+        serve(builder, args.port)
+    elif not result.ok:
+        sys.exit(1)
 
-main()
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except ValueError:
+            return {}
+
+
+def save_manifest(path, manifest):
+    # an unchanged manifest is left alone, and a changed one is written as a
+    # new file: truncating a file that was just written makes ext4 flush it
+    # first, which dominates back-to-back builds. A torn manifest loads as
+    # empty either way
+    text = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == text:
+                return
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    dir_path = os.path.dirname(path)
+    if dir_path != "":
+        os.makedirs(dir_path, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def remove_output(path, root):
+    root = os.path.abspath(root)
+    if not os.path.abspath(path).startswith(root + os.sep):
+        raise ValueError(f"refusing to remove {path}: not under {root}")
+    if os.path.exists(path):
+        os.remove(path)
+    dir_path = os.path.dirname(path)
+    while os.path.abspath(dir_path).startswith(root + os.sep):
+        if os.listdir(dir_path):
+            break
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
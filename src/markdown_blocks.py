@@ -1,8 +1,15 @@
+import mmap
 from enum import Enum
+from urllib.parse import unquote
 
-from htmlnode import ParentNode
-from inline_markdown import text_to_textnodes
-from textnode import text_node_to_html_node, TextNode, TextType
+from frontmatter import is_front_matter, parse_front_matter
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import extract_markdown_images, text_to_textnodes
+from textnode import text_node_to_html_node
+from toc import Outline
+
+
+BUFFER_TYPES = (bytes, bytearray, mmap.mmap)
 
 
 class BlockType(Enum):
@@ -25,6 +32,134 @@ def markdown_to_blocks(markdown):
     return filtered_blocks
 
 
+def iter_lines(source):
+    if isinstance(source, BUFFER_TYPES):
+        # UTF-8 bytes (e.g. a memory-mapped file) are decoded a line at a
+        # time; a trailing \r is dropped, as text mode would translate \r\n
+        start = 0
+        while True:
+            end = source.find(b"\n", start)
+            if end == -1:
+                yield source[start:].removesuffix(b"\r").decode("utf-8")
+                return
+            yield source[start:end].removesuffix(b"\r").decode("utf-8")
+            start = end + 1
+    if isinstance(source, str):
+        start = 0
+        while True:
+            end = source.find("\n", start)
+            if end == -1:
+                yield source[start:]
+                return
+            yield source[start:end]
+            start = end + 1
+    ended_with_newline = True
+    for line in source:
+        ended_with_newline = line.endswith("\n")
+        yield line[:-1] if ended_with_newline else line
+    if ended_with_newline:
+        yield ""
+
+
+def iter_blocks(source):
+    # yields the same blocks as markdown_to_blocks, with their types, reading
+    # the document (a string, UTF-8 bytes or a text file object) one line at
+    # a time
+    lines = iter_lines(source)
+    scanner = BlockScanner()
+    scanner.add(next(lines))
+    pending_blank = False
+    for line in lines:
+        if pending_blank:
+            if not scanner.is_empty():
+                yield scanner.finish()
+            scanner = BlockScanner()
+            scanner.add(line)
+            pending_blank = False
+        elif line == "":
+            pending_blank = True
+        else:
+            scanner.add(line)
+    if pending_blank:
+        scanner.add("")
+    if not scanner.is_empty():
+        yield scanner.finish()
+
+
+class BlockScanner:
+    __slots__ = (
+        "raw_text",
+        "lines",
+        "blank_lines",
+        "last",
+        "quote",
+        "ulist",
+        "olist",
+    )
+
+    def __init__(self):
+        self.raw_text = None
+        self.lines = []
+        self.blank_lines = []
+        self.last = None
+        self.quote = True
+        self.ulist = True
+        self.olist = True
+
+    def is_empty(self):
+        return self.raw_text == ""
+
+    def add(self, line):
+        # only needs to know whether the unstripped block would be ""
+        self.raw_text = line if self.raw_text is None else "\n"
+        if line == "" or line.isspace():
+            if self.last is not None:
+                self.blank_lines.append(line)
+            return
+        if self.last is None:
+            self.last = line.lstrip()
+            return
+        self.push(self.last)
+        for blank_line in self.blank_lines:
+            self.push(blank_line)
+        self.blank_lines = []
+        self.last = line
+
+    def push(self, line):
+        # the last line is held back until the block ends, since strip() may
+        # still shorten it
+        if self.quote and not line.startswith(">"):
+            self.quote = False
+        if self.ulist and not line.startswith("- "):
+            self.ulist = False
+        if self.olist and not line.startswith(f"{len(self.lines) + 1}. "):
+            self.olist = False
+        self.lines.append(line)
+
+    def finish(self):
+        if self.last is None:
+            return "", BlockType.PARAGRAPH
+        self.push(self.last.rstrip())
+        lines = self.lines
+        block = "\n".join(lines)
+        first = lines[0]
+        if first.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+            block_type = BlockType.HEADING
+        elif (
+            len(lines) > 1 and first.startswith("```") and lines[-1].startswith("```")
+        ):
+            block_type = BlockType.CODE
+        elif self.quote:
+            block_type = BlockType.QUOTE
+        elif self.ulist:
+            block_type = BlockType.ULIST
+        elif self.olist:
+            block_type = BlockType.OLIST
+        else:
+            block_type = BlockType.PARAGRAPH
+        return block, block_type
+
+
 def block_to_block_type(block):
     lines = block.split("\n")
 
@@ -52,49 +187,95 @@ def block_to_block_type(block):
     return BlockType.PARAGRAPH
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+def markdown_to_html_node(markdown, cache=None, outline=None):
+    # with an Outline, headings get ids and are recorded in it as they render
+    children = [
+        render_block(block, block_type, cache, outline)
+        for block, block_type in iter_blocks(markdown)
+    ]
     return ParentNode("div", children, None)
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
-    if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
-    if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
-    if block_type == BlockType.CODE:
-        return code_to_html_node(block)
-    if block_type == BlockType.OLIST:
-        return olist_to_html_node(block)
-    if block_type == BlockType.ULIST:
-        return ulist_to_html_node(block)
-    if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
-    raise ValueError("invalid block type")
-
-
-def text_to_children(text):
+def markdown_to_page(markdown, cache=None, plain_text=None):
+    # reads front matter, finds the title, collects the outline and renders
+    # the body in a single pass over the blocks; the title falls back to the
+    # first "# " line and meta["images"] lists the image urls outside code
+    # blocks. With a plain_text list, the text of every TextNode (and code
+    # block) is appended to it as the blocks render
+    meta = {}
+    title = None
+    images = []
+    outline = Outline()
+    children = []
+    for index, (block, block_type) in enumerate(iter_blocks(markdown)):
+        if index == 0 and is_front_matter(block):
+            meta = parse_front_matter(block)
+            continue
+        if title is None:
+            title = find_title(block)
+        if block_type != BlockType.CODE:
+            for _, url in extract_markdown_images(block):
+                if unquote(url) not in images:
+                    images.append(unquote(url))
+        children.append(render_block(block, block_type, cache, outline, plain_text))
+    if "title" not in meta and title is not None:
+        meta["title"] = title
+    meta["outline"] = outline.entries
+    meta["images"] = images
+    return meta, ParentNode("div", children, None)
+
+
+def find_title(block):
+    for line in iter_lines(block):
+        if line.startswith("# "):
+            return line[2:]
+    return None
+
+
+def render_block(block, block_type, cache=None, outline=None, plain_text=None):
+    if outline is not None and block_type == BlockType.HEADING:
+        # a heading's id depends on the headings before it, so it is never
+        # served from the block cache
+        return heading_to_html_node(block, outline, plain_text)
+    if cache is None or plain_text is not None:
+        # cached blocks are only HTML, without the text nodes to collect
+        return block_to_html_node(block, block_type, plain_text)
+    key = cache.key(block)
+    html = cache.get(key)
+    if html is None:
+        html = block_to_html_node(block, block_type).to_html()
+        cache.put(key, html)
+    return LeafNode(None, html)
+
+
+def block_to_html_node(block, block_type=None, plain_text=None):
+    if block_type is None:
+        block_type = block_to_block_type(block)
+    renderer = BLOCK_RENDERERS.get(block_type)
+    if renderer is None:
+        raise ValueError("invalid block type")
+    return renderer(block, plain_text=plain_text)
+
+
+def text_to_children(text, plain_text=None):
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
         html_node = text_node_to_html_node(text_node)
         children.append(html_node)
+        if plain_text is not None:
+            plain_text.append(text_node.text)
     return children
 
 
-def paragraph_to_html_node(block):
+def paragraph_to_html_node(block, plain_text=None):
     lines = block.split("\n")
     paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
+    children = text_to_children(paragraph, plain_text)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, outline=None, plain_text=None):
     level = 0
     for char in block:
         if char == "#":
@@ -104,41 +285,47 @@ def heading_to_html_node(block):
     if level + 1 >= len(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    text_nodes = text_to_textnodes(text)
+    children = [text_node_to_html_node(text_node) for text_node in text_nodes]
+    if plain_text is not None:
+        plain_text.extend(text_node.text for text_node in text_nodes)
+    if outline is None:
+        return ParentNode(f"h{level}", children)
+    heading_id = outline.add(level, "".join(node.text for node in text_nodes))
+    return ParentNode(f"h{level}", children, {"id": heading_id})
 
 
-def code_to_html_node(block):
+def code_to_html_node(block, plain_text=None):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
     text = block[4:-3]
-    raw_text_node = TextNode(text, TextType.TEXT)
-    child = text_node_to_html_node(raw_text_node)
-    code = ParentNode("code", [child])
+    if plain_text is not None:
+        plain_text.append(text)
+    code = LeafNode("code", text)
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
+def olist_to_html_node(block, plain_text=None):
     items = block.split("\n")
     html_items = []
     for item in items:
         text = item[3:]
-        children = text_to_children(text)
+        children = text_to_children(text, plain_text)
         html_items.append(ParentNode("li", children))
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
+def ulist_to_html_node(block, plain_text=None):
     items = block.split("\n")
     html_items = []
     for item in items:
         text = item[2:]
-        children = text_to_children(text)
+        children = text_to_children(text, plain_text)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
+def quote_to_html_node(block, plain_text=None):
     lines = block.split("\n")
     new_lines = []
     for line in lines:
@@ -146,6 +333,16 @@ def quote_to_html_node(block):
             raise ValueError("invalid quote block")
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
-    children = text_to_children(content)
+    children = text_to_children(content, plain_text)
     return ParentNode("blockquote", children)
 
+
+
+BLOCK_RENDERERS = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.OLIST: olist_to_html_node,
+    BlockType.ULIST: ulist_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+}
@@ -0,0 +1,126 @@
+import os
+import shutil
+import threading
+
+from linkcheck import find_output_files
+from manifest import hash_file, load_manifest, remove_output, save_manifest
+
+
+DEPLOY_MANIFEST_FILENAME = ".deploy-manifest.json"
+
+
+class AtomicFile:
+    # writes go to a temp file next to the destination; on close it replaces
+    # the destination only if the bytes differ, so unchanged outputs keep
+    # their mtime and readers never see a half-written file
+    def __init__(self, path, mode="w"):
+        self.path = str(path)
+        self.mode = mode
+        self.temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.file = None
+        self.changed = None
+
+    def __enter__(self):
+        dir_path = os.path.dirname(self.path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        if "b" in self.mode:
+            self.file = open(self.temp_path, self.mode)
+        else:
+            self.file = open(self.temp_path, self.mode, encoding="utf-8")
+        return self.file
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.close()
+        if exc_type is not None:
+            os.remove(self.temp_path)
+            return False
+        self.changed = not same_contents(self.temp_path, self.path)
+        if self.changed:
+            os.replace(self.temp_path, self.path)
+        else:
+            os.remove(self.temp_path)
+        return False
+
+
+def same_contents(path, other_path):
+    try:
+        if os.path.getsize(path) != os.path.getsize(other_path):
+            return False
+        with open(path, "rb") as f, open(other_path, "rb") as other:
+            while True:
+                chunk = f.read(65536)
+                if chunk != other.read(65536):
+                    return False
+                if not chunk:
+                    return True
+    except FileNotFoundError:
+        return False
+
+
+def write_if_changed(path, text):
+    writer = AtomicFile(path)
+    with writer as f:
+        f.write(text)
+    return writer.changed
+
+
+def copy_if_changed(from_path, dest_path):
+    if same_contents(from_path, dest_path):
+        return False
+    with AtomicFile(dest_path, "wb") as dst, open(from_path, "rb") as src:
+        shutil.copyfileobj(src, dst)
+    shutil.copystat(from_path, dest_path)
+    return True
+
+
+def prune_outputs(dest_dir_path, keep, verbose=True):
+    removed = []
+    for rel_path in sorted(find_output_files(dest_dir_path) - set(keep)):
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        if verbose:
+            print(f" * removing {dest_path}")
+        remove_output(dest_path, dest_dir_path)
+        removed.append(rel_path)
+    return removed
+
+
+def scan_outputs(dest_dir_path, previous=None, exclude=()):
+    # hashes are reused for files whose size and mtime match the previous
+    # manifest, which holds for every output that was left untouched
+    previous = previous or {}
+    exclude = set(exclude) | {DEPLOY_MANIFEST_FILENAME}
+    files = {}
+    for rel_path in sorted(find_output_files(dest_dir_path) - exclude):
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        stat = os.stat(dest_path)
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        old_entry = previous.get(rel_path, {})
+        if old_entry.get("size") == entry["size"] and old_entry.get(
+            "mtime"
+        ) == entry["mtime"]:
+            entry["sha256"] = old_entry.get("sha256") or hash_file(dest_path)
+        else:
+            entry["sha256"] = hash_file(dest_path)
+        files[rel_path] = entry
+    return files
+
+
+def diff_outputs(old_files, new_files):
+    return {
+        "added": sorted(new_files.keys() - old_files.keys()),
+        "changed": sorted(
+            rel_path
+            for rel_path in new_files.keys() & old_files.keys()
+            if new_files[rel_path]["sha256"] != old_files[rel_path]["sha256"]
+        ),
+        "removed": sorted(old_files.keys() - new_files.keys()),
+    }
+
+
+def update_deploy_manifest(dest_dir_path, exclude=()):
+    manifest_path = os.path.join(dest_dir_path, DEPLOY_MANIFEST_FILENAME)
+    old_files = load_manifest(manifest_path).get("files", {})
+    new_files = scan_outputs(dest_dir_path, old_files, exclude)
+    save_manifest(manifest_path, {"files": new_files})
+    return diff_outputs(old_files, new_files)
@@ -0,0 +1,190 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+DEFAULT_CACHE_PATH = "./.cache/parse.sqlite"
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    title TEXT NOT NULL,
+    html TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    meta TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (key, version)
+)
+"""
+COLUMNS = ("key", "version", "title", "html", "last_used", "meta")
+
+_connections = {}
+
+
+class ParseCache:
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+
+    def __getstate__(self):
+        return {"path": self.path, "version": self.version}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["version"])
+
+    @property
+    def connection(self):
+        connection = _connections.get(self.path)
+        if connection is None:
+            dir_path = os.path.dirname(self.path)
+            if dir_path != "":
+                os.makedirs(dir_path, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(SCHEMA)
+            if "meta" not in table_columns(connection, "main"):
+                connection.execute(
+                    "ALTER TABLE pages ADD COLUMN meta TEXT NOT NULL DEFAULT '{}'"
+                )
+            _connections[self.path] = connection
+        return connection
+
+    def key(self, markdown):
+        if isinstance(markdown, str):
+            markdown = markdown.encode("utf-8")
+        return hashlib.sha256(markdown).hexdigest()
+
+    def get(self, key):
+        row = self.connection.execute(
+            "SELECT title, html, meta FROM pages WHERE key = ? AND version = ?",
+            (key, self.version),
+        ).fetchone()
+        if row is None:
+            return None
+        self.connection.execute(
+            "UPDATE pages SET last_used = ? WHERE key = ? AND version = ?",
+            (time.time(), key, self.version),
+        )
+        title, html, meta = row
+        return title, html, json.loads(meta)
+
+    def put(self, key, title, html, meta=None):
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO pages ({', '.join(COLUMNS)}) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, self.version, title, html, time.time(), json.dumps(meta or {})),
+        )
+
+    def stats(self):
+        entries, size = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(html)), 0) FROM pages"
+        ).fetchone()
+        versions = dict(
+            self.connection.execute(
+                "SELECT version, COUNT(*) FROM pages GROUP BY version"
+            ).fetchall()
+        )
+        return {
+            "path": self.path,
+            "entries": entries,
+            "html_chars": size,
+            "file_bytes": os.path.getsize(self.path),
+            "versions": versions,
+        }
+
+    def prune(self, max_age=None):
+        cursor = self.connection.execute(
+            "DELETE FROM pages WHERE version != ?", (self.version,)
+        )
+        removed = cursor.rowcount
+        if max_age is not None:
+            cursor = self.connection.execute(
+                "DELETE FROM pages WHERE last_used < ?", (time.time() - max_age,)
+            )
+            removed += cursor.rowcount
+        self.connection.execute("VACUUM")
+        return removed
+
+    def export(self, dest_path):
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        dest = sqlite3.connect(dest_path)
+        try:
+            self.connection.backup(dest)
+        finally:
+            dest.close()
+
+    def import_from(self, source_path):
+        before = self.stats()["entries"]
+        self.connection.execute("ATTACH DATABASE ? AS source", (source_path,))
+        try:
+            # exports from before the meta column still import, without it
+            columns = ", ".join(
+                column
+                for column in COLUMNS
+                if column in table_columns(self.connection, "source")
+            )
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO pages ({columns}) "
+                f"SELECT {columns} FROM source.pages"
+            )
+        finally:
+            self.connection.execute("DETACH DATABASE source")
+        return self.stats()["entries"] - before
+
+    def close(self):
+        connection = _connections.pop(self.path, None)
+        if connection is not None:
+            connection.close()
+
+
+def table_columns(connection, schema):
+    rows = connection.execute(f"PRAGMA {schema}.table_info(pages)").fetchall()
+    return {row[1] for row in rows}
+
+
+def main():
+    from gencontent import GENERATOR_VERSION
+
+    parser = argparse.ArgumentParser(description="Manage the persistent parse cache.")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("inspect", help="show cache statistics")
+    prune = commands.add_parser(
+        "prune", help="drop entries from other generator versions"
+    )
+    prune.add_argument(
+        "--max-age-days",
+        type=float,
+        help="also drop entries not used for this many days",
+    )
+    export = commands.add_parser("export", help="copy the cache to a file")
+    export.add_argument("dest")
+    import_ = commands.add_parser("import", help="merge entries from an exported file")
+    import_.add_argument("source")
+    args = parser.parse_args()
+
+    cache = ParseCache(args.cache, GENERATOR_VERSION)
+    try:
+        if args.command == "inspect":
+            for key, value in cache.stats().items():
+                print(f"{key}: {value}")
+        elif args.command == "prune":
+            max_age = None
+            if args.max_age_days is not None:
+                max_age = args.max_age_days * 86400
+            print(f"Removed {cache.prune(max_age)} entries")
+        elif args.command == "export":
+            cache.export(args.dest)
+            print(f"Exported {args.cache} to {args.dest}")
+        elif args.command == "import":
+            print(f"Imported {cache.import_from(args.source)} new entries")
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import contextlib
+import mmap
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from output import write_if_changed
+
+
+DEFAULT_DEPTH = 8
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@contextlib.contextmanager
+def open_mapped(path):
+    # the buffer is only valid inside the block; mmap cannot map empty files
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def write_text(path, text):
+    write_if_changed(path, text)
+
+
+def prefetch(paths, read=read_text, depth=DEFAULT_DEPTH):
+    # yields one future per path, in order, with at most `depth` reads
+    # running ahead of the consumer
+    paths = iter(paths)
+    with ThreadPoolExecutor(max_workers=min(depth, 4)) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append(executor.submit(read, path))
+            if len(pending) >= depth:
+                break
+        while pending:
+            future = pending.popleft()
+            for path in paths:
+                pending.append(executor.submit(read, path))
+                break
+            yield future
+
+
+class BackgroundWriter:
+    def __init__(self, depth=DEFAULT_DEPTH, write=write_text):
+        self.queue = queue.Queue(maxsize=depth)
+        self.write_file = write
+        self.errors = []
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, path, text):
+        self.queue.put((path, text))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            path, text = item
+            try:
+                self.write_file(path, text)
+            except Exception as e:
+                self.errors.append((path, e))
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        return self.errors
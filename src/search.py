@@ -0,0 +1,110 @@
+import json
+import os
+import re
+
+from linkcheck import find_output_files
+from manifest import load_manifest, remove_output, save_manifest
+from output import write_if_changed
+from siteindex import page_url
+
+
+SEARCH_CACHE_FILENAME = ".search-cache.json"
+SEARCH_DIR = "search-index"
+SEARCH_VERSION = 1
+SHARD_PREFIX_LENGTH = 2
+TITLE_WEIGHT = 10
+TOKEN_PATTERN = re.compile(r"\w+")
+SHARD_NAME_PATTERN = re.compile(r"[^a-z0-9]")
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) > 1]
+
+
+def page_postings(title, plain_text):
+    # term -> weight, where a title occurrence counts TITLE_WEIGHT times
+    postings = {}
+    for text in plain_text:
+        for token in tokenize(text):
+            postings[token] = postings.get(token, 0) + 1
+    for token in tokenize(title):
+        postings[token] = postings.get(token, 0) + TITLE_WEIGHT
+    return postings
+
+
+def shard_name(term):
+    # the client derives the same name from a query term, so only the
+    # shards it needs are downloaded
+    return SHARD_NAME_PATTERN.sub("_", term[:SHARD_PREFIX_LENGTH])
+
+
+class SearchIndex:
+    def __init__(self, dest_dir_path):
+        self.dest_dir_path = dest_dir_path
+        self.cache_path = os.path.join(dest_dir_path, SEARCH_CACHE_FILENAME)
+        self.cached = load_manifest(self.cache_path).get("postings", {})
+        self.pages = {}
+        self.keys = set()
+
+    def page_path(self, dest_path):
+        rel_path = os.path.relpath(dest_path, self.dest_dir_path)
+        return rel_path.replace(os.sep, "/")
+
+    def known_keys(self):
+        return frozenset(self.cached)
+
+    def add(self, dest_path, meta, key, postings=None):
+        if postings is not None:
+            self.cached[key] = postings
+        self.keys.add(key)
+        if meta.get("draft"):
+            return
+        self.pages[self.page_path(dest_path)] = (meta.get("title", ""), key)
+
+    def remove(self, dest_path):
+        self.pages.pop(self.page_path(dest_path), None)
+
+    def shards(self, basepath="/"):
+        pages = []
+        shards = {}
+        for page_id, rel_path in enumerate(sorted(self.pages)):
+            title, key = self.pages[rel_path]
+            pages.append([basepath.rstrip("/") + page_url(rel_path), title])
+            for term, weight in sorted(self.cached[key].items()):
+                shard = shards.setdefault(shard_name(term), {})
+                shard.setdefault(term, []).append([page_id, weight])
+        return pages, shards
+
+
+def write_search_index(index, basepath="/", verbose=True):
+    # writes search-index/index.json (pages and shard names) and one
+    # search-index/<prefix>.json per term prefix; returns the written paths
+    pages, shards = index.shards(basepath)
+    outputs = {
+        f"{SEARCH_DIR}/index.json": {
+            "version": SEARCH_VERSION,
+            "prefix": SHARD_PREFIX_LENGTH,
+            "pages": pages,
+            "shards": sorted(shards),
+        }
+    }
+    for name, terms in shards.items():
+        outputs[f"{SEARCH_DIR}/{name}.json"] = terms
+
+    for rel_path, data in outputs.items():
+        dest_path = os.path.join(index.dest_dir_path, rel_path)
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        if write_if_changed(dest_path, text) and verbose:
+            print(f" * {dest_path}")
+    search_dir_path = os.path.join(index.dest_dir_path, SEARCH_DIR)
+    for rel_path in sorted(find_output_files(search_dir_path)):
+        if f"{SEARCH_DIR}/{rel_path}" not in outputs:
+            dest_path = os.path.join(search_dir_path, rel_path)
+            if verbose:
+                print(f" * removing {dest_path}")
+            remove_output(dest_path, index.dest_dir_path)
+
+    # only postings of pages in this build are kept for the next one
+    postings = {key: index.cached[key] for key in sorted(index.keys)}
+    save_manifest(index.cache_path, {"postings": postings})
+    return sorted(outputs)
@@ -0,0 +1,146 @@
+import hashlib
+import os
+
+from linkcheck import find_output_files
+from manifest import load_manifest, save_manifest
+from output import copy_if_changed
+
+
+SHARD_MANIFEST_FILENAME = ".shard-manifest.json"
+SHARDS_DIR = "./shards"
+
+
+class ShardError(Exception):
+    pass
+
+
+def parse_shard(text):
+    # "i/N" with 1 <= i <= N, the way CI matrices number their runners
+    index, separator, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"invalid shard {text!r}, expected i/N") from None
+    if separator == "" or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"invalid shard {text!r}, expected i/N with 1 <= i <= N")
+    return index, count
+
+
+def shard_dir(index, count):
+    return os.path.join(SHARDS_DIR, f"{index}-of-{count}")
+
+
+def shard_of(rel_path, count):
+    # a stable hash of the source path relative to the content directory, so
+    # every runner agrees on the partition whatever the checkout location
+    digest = hashlib.sha256(rel_path.replace(os.sep, "/").encode("utf-8"))
+    return int.from_bytes(digest.digest()[:8], "big") % count + 1
+
+
+def select_shard(pages, dir_path_content, shard):
+    index, count = shard
+    return [
+        (from_path, dest_path)
+        for from_path, dest_path in pages
+        if shard_of(os.path.relpath(from_path, dir_path_content), count) == index
+    ]
+
+
+def write_shard_manifest(
+    dest_dir_path,
+    shard,
+    outputs,
+    site_index,
+    link_index,
+    search_index,
+    version,
+    settings,
+):
+    # everything the merge needs to finish the site without re-rendering:
+    # the files this shard owns and each page's meta, links and postings,
+    # plus the settings that shaped their bytes
+    pages = {}
+    for rel_path, (source, meta) in sorted(site_index.pages.items()):
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        page = {"source": source, "meta": meta}
+        page["links"] = link_index.links_for(dest_path)
+        if rel_path in search_index.pages:
+            _, key = search_index.pages[rel_path]
+            page["search"] = [key, search_index.cached[key]]
+        pages[rel_path] = page
+    save_manifest(
+        os.path.join(dest_dir_path, SHARD_MANIFEST_FILENAME),
+        {
+            "version": version,
+            "settings": settings,
+            "shard": list(shard),
+            "outputs": sorted(outputs),
+            "pages": pages,
+        },
+    )
+
+
+def load_shard_manifests(shard_dir_paths, version, settings):
+    # every shard of one build must be present exactly once, rendered with
+    # the settings the merge finishes the site with
+    manifests = {}
+    count = None
+    for dir_path in shard_dir_paths:
+        manifest = load_manifest(os.path.join(dir_path, SHARD_MANIFEST_FILENAME))
+        if "shard" not in manifest:
+            raise ShardError(f"{dir_path} is not a shard build")
+        if manifest["version"] != version:
+            raise ShardError(
+                f"{dir_path} was built by generator version {manifest['version']}"
+            )
+        built = manifest.get("settings", {})
+        for name, value in sorted(settings.items()):
+            if built.get(name) != value:
+                raise ShardError(
+                    f"{dir_path} was built with {name} {built.get(name)!r}, "
+                    f"not {value!r}"
+                )
+        index, shard_count = manifest["shard"]
+        if count is None:
+            count = shard_count
+        elif shard_count != count:
+            raise ShardError(
+                f"{dir_path} is shard {index}/{shard_count}, not one of {count}"
+            )
+        if index in manifests:
+            raise ShardError(
+                f"shard {index}/{count} given twice: {manifests[index][0]}, {dir_path}"
+            )
+        manifests[index] = (dir_path, manifest)
+    missing = [index for index in range(1, (count or 0) + 1) if index not in manifests]
+    if count is None or missing:
+        raise ShardError(f"missing shards: {', '.join(map(str, missing)) or 'all'}")
+    return [manifests[index] for index in sorted(manifests)]
+
+
+def find_collisions(manifests):
+    owners = {}
+    collisions = []
+    for dir_path, manifest in manifests:
+        for rel_path in manifest["outputs"]:
+            if rel_path in owners:
+                collisions.append(f"{rel_path}: {owners[rel_path]}, {dir_path}")
+            else:
+                owners[rel_path] = dir_path
+    return collisions
+
+
+def merge_shard_outputs(manifests, dest_dir_path, verbose=True):
+    # refuses to merge when two shards claim the same output; files are only
+    # copied when their bytes differ from what the destination holds
+    collisions = find_collisions(manifests)
+    if collisions:
+        raise ShardError("colliding shard outputs:\n" + "\n".join(collisions))
+    for dir_path, manifest in manifests:
+        present = find_output_files(dir_path)
+        for rel_path in manifest["outputs"]:
+            if rel_path not in present:
+                raise ShardError(f"{dir_path} is missing {rel_path}")
+            dest_path = os.path.join(dest_dir_path, rel_path)
+            if copy_if_changed(os.path.join(dir_path, rel_path), dest_path) and verbose:
+                print(f" * {dir_path}/{rel_path} -> {dest_path}")
@@ -0,0 +1,362 @@
+import os
+import time
+
+from buildreport import phase
+from compress import (
+    COMPRESS_MANIFEST_FILENAME,
+    compress_outputs,
+    compressed_variants,
+)
+from copystatic import (
+    STATIC_MANIFEST_FILENAME,
+    copy_files_recursive,
+    find_static_files,
+    sync_files_recursive,
+)
+from gencontent import (
+    GENERATOR_VERSION,
+    MANIFEST_FILENAME,
+    PageBuildError,
+    find_pages,
+    generate_pages_incremental,
+    generate_pages_recursive,
+)
+from imagesize import IMAGE_MANIFEST_FILENAME, index_images
+from linkcheck import BrokenLinksError, LinkIndex
+from manifest import save_manifest
+from output import DEPLOY_MANIFEST_FILENAME, prune_outputs, update_deploy_manifest
+from parsecache import ParseCache
+from search import SEARCH_CACHE_FILENAME, SearchIndex, write_search_index
+from shard import (
+    SHARD_MANIFEST_FILENAME,
+    ShardError,
+    load_shard_manifests,
+    merge_shard_outputs,
+    write_shard_manifest,
+)
+from siteindex import SITE_INDEX_MANIFEST_FILENAME, SiteIndex, write_site_index
+from template import load_template
+
+
+manifest_filenames = (
+    MANIFEST_FILENAME,
+    STATIC_MANIFEST_FILENAME,
+    DEPLOY_MANIFEST_FILENAME,
+    COMPRESS_MANIFEST_FILENAME,
+    IMAGE_MANIFEST_FILENAME,
+    SITE_INDEX_MANIFEST_FILENAME,
+    SEARCH_CACHE_FILENAME,
+)
+
+
+class BuildConfig:
+    # every setting of one build; the defaults match the command line's
+    def __init__(
+        self,
+        basepath="/",
+        static="./static",
+        public="./docs",
+        content="./content",
+        template="./template.html",
+        incremental=False,
+        checksum=False,
+        hardlink=False,
+        jobs=1,
+        verbose=True,
+        parse_cache=None,
+        check_links=False,
+        async_io=0,
+        deploy_diff=None,
+        compress=False,
+        site_url=None,
+        search=False,
+        shard=None,
+        drafts=False,
+    ):
+        self.basepath = basepath
+        self.static = static
+        self.public = public
+        self.content = content
+        self.template = template
+        self.incremental = incremental
+        self.checksum = checksum
+        self.hardlink = hardlink
+        self.jobs = jobs
+        self.verbose = verbose
+        self.parse_cache = parse_cache
+        self.check_links = check_links
+        self.async_io = async_io
+        self.deploy_diff = deploy_diff
+        self.compress = compress
+        self.site_url = site_url
+        self.search = search
+        # (index, count) renders only that part of the content into public,
+        # for merge_shards to combine
+        self.shard = shard
+        # write pages marked draft: true; listings and search still skip them
+        self.drafts = drafts
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    def replace(self, **changes):
+        # raises TypeError for a setting that does not exist
+        return BuildConfig(**{**self.to_dict(), **changes})
+
+
+class BuildResult:
+    def __init__(self):
+        self.changes = {"added": [], "changed": [], "removed": []}
+        self.failures = []
+        self.broken_links = []
+        self.error = None
+        self.seconds = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def message(self):
+        if self.error is None:
+            return None
+        if isinstance(self.error, (PageBuildError, BrokenLinksError, ShardError)):
+            return str(self.error)
+        return f"{type(self.error).__name__}: {self.error}"
+
+    def to_dict(self):
+        return {
+            "ok": self.ok,
+            "error": self.message,
+            "changes": self.changes,
+            "failures": self.failures,
+            "broken_links": self.broken_links,
+            "seconds": self.seconds,
+        }
+
+
+def build_site(config, report=None, cache=None, changed=None):
+    # page failures and broken links are reported on the result rather than
+    # raised; cache is a BlockCache kept by long-lived callers between builds,
+    # and changed, the absolute paths a watcher saw change, narrows what an
+    # incremental build fingerprints
+    return collect_result(run_build, config, report, cache, changed)
+
+
+def merge_shards(config, shard_dir_paths, report=None):
+    # combines the shard builds into config.public, then writes listings,
+    # the search index and the deploy manifest as a full build would
+    return collect_result(run_merge, config, shard_dir_paths, report)
+
+
+def collect_result(run, *args):
+    start = time.perf_counter()
+    result = BuildResult()
+    try:
+        run(result, *args)
+    except PageBuildError as e:
+        result.error = e
+        result.failures = [
+            (from_path, str(error)) for from_path, error in e.failures
+        ]
+    except BrokenLinksError as e:
+        result.error = e
+        result.broken_links = [str(link) for link in e.broken]
+    except Exception as e:
+        # a missing directory or an unreadable file fails this build only;
+        # long-lived callers like the daemon keep running
+        result.error = e
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def run_build(result, config, report=None, cache=None, changed=None):
+    basepath = config.basepath
+    verbose = config.verbose
+    parse_cache = None
+    if config.parse_cache:
+        parse_cache = ParseCache(config.parse_cache, GENERATOR_VERSION)
+    # a shard always collects links and postings, since the merge decides
+    # whether to check or index them
+    link_index = None
+    if config.check_links or config.shard is not None:
+        link_index = LinkIndex(config.public)
+    site_index = SiteIndex(config.public)
+    search_index = None
+    if config.search or config.shard is not None:
+        search_index = SearchIndex(config.public)
+    # static files belong to the first shard
+    copy_static = config.shard is None or config.shard[0] == 1
+
+    os.makedirs(config.public, exist_ok=True)
+    if copy_static:
+        print("Copying static files to public directory...")
+        with phase(report, "static"):
+            if config.incremental:
+                sync_files_recursive(
+                    config.static,
+                    config.public,
+                    config.checksum,
+                    config.hardlink,
+                    verbose,
+                )
+            else:
+                copy_files_recursive(config.static, config.public, verbose)
+
+    with phase(report, "images"):
+        images = index_images(config.static, config.public)
+
+    print("Generating content...")
+    generate = generate_pages_recursive
+    options = {}
+    if config.shard is not None:
+        options["shard"] = config.shard
+    elif config.incremental:
+        generate = generate_pages_incremental
+        options["changed"] = changed
+    try:
+        generate(
+            config.content,
+            config.template,
+            config.public,
+            basepath,
+            jobs=config.jobs,
+            report=report,
+            verbose=verbose,
+            parse_cache=parse_cache,
+            link_index=link_index,
+            io_depth=config.async_io,
+            images=images,
+            site_index=site_index,
+            search_index=search_index,
+            cache=cache,
+            drafts=config.drafts,
+            **options,
+        )
+    finally:
+        if parse_cache is not None:
+            parse_cache.close()
+
+    if config.shard is not None:
+        outputs = {
+            rel_path
+            for rel_path, (_, meta) in site_index.pages.items()
+            if config.drafts or not meta.get("draft")
+        }
+        if copy_static:
+            outputs |= static_outputs(config)
+        write_shard_manifest(
+            config.public,
+            config.shard,
+            outputs,
+            site_index,
+            link_index,
+            search_index,
+            GENERATOR_VERSION,
+            shard_settings(config),
+        )
+        with phase(report, "prune"):
+            keep = outputs | set(manifest_filenames) | {SHARD_MANIFEST_FILENAME}
+            prune_outputs(config.public, keep, verbose)
+        index, count = config.shard
+        print(f"Shard {index}/{count}: {len(site_index.pages)} pages")
+        return
+    finish_build(result, config, report, images, site_index, link_index, search_index)
+
+
+def run_merge(result, config, shard_dir_paths, report=None):
+    with phase(report, "merge"):
+        manifests = load_shard_manifests(
+            shard_dir_paths, GENERATOR_VERSION, shard_settings(config)
+        )
+        print("Merging shards into public directory...")
+        merge_shard_outputs(manifests, config.public, config.verbose)
+
+    with phase(report, "images"):
+        images = index_images(config.static, config.public)
+
+    link_index = None
+    if config.check_links:
+        link_index = LinkIndex(config.public)
+    site_index = SiteIndex(config.public)
+    search_index = None
+    if config.search:
+        search_index = SearchIndex(config.public)
+    for _, manifest in manifests:
+        for rel_path, page in manifest["pages"].items():
+            dest_path = os.path.join(config.public, rel_path)
+            site_index.add(dest_path, page["source"], page["meta"])
+            if link_index is not None:
+                link_index.add(dest_path, page["source"], page["links"])
+            if search_index is not None and "search" in page:
+                key, postings = page["search"]
+                search_index.add(dest_path, page["meta"], key, postings)
+    finish_build(result, config, report, images, site_index, link_index, search_index)
+
+
+def finish_build(result, config, report, images, site_index, link_index, search_index):
+    basepath = config.basepath
+    verbose = config.verbose
+    print("Writing listings...")
+    with phase(report, "index"):
+        template = load_template(config.template, basepath, images)
+        generated = write_site_index(
+            site_index, template, basepath, config.site_url, verbose
+        )
+    if search_index is not None:
+        print("Writing search index...")
+        with phase(report, "search"):
+            generated += write_search_index(search_index, basepath, verbose)
+
+    if not config.incremental:
+        # outputs are only rewritten when their bytes change, so rather than
+        # deleting the public directory up front, leftovers are pruned here
+        print("Removing stale files from public directory...")
+        with phase(report, "prune"):
+            keep = expected_outputs(config) | set(generated)
+            if config.compress:
+                keep |= compressed_variants(keep)
+            prune_outputs(config.public, keep, verbose)
+
+    if config.compress:
+        print("Compressing outputs...")
+        with phase(report, "compress"):
+            compress_outputs(config.public, manifest_filenames, verbose=verbose)
+
+    with phase(report, "deploy"):
+        changes = update_deploy_manifest(config.public, manifest_filenames)
+    print(
+        f"Deploy: {len(changes['added'])} added, {len(changes['changed'])} changed, "
+        f"{len(changes['removed'])} removed"
+    )
+    if config.deploy_diff:
+        save_manifest(config.deploy_diff, changes)
+    result.changes = changes
+
+    if link_index is not None:
+        with phase(report, "links"):
+            broken = link_index.check()
+        for link in broken:
+            print(link)
+        if broken:
+            raise BrokenLinksError(broken)
+
+
+def shard_settings(config):
+    # the settings that change the bytes of rendered pages must match
+    # between the shards and the merge
+    return {"basepath": config.basepath, "drafts": config.drafts}
+
+
+def static_outputs(config):
+    return {
+        rel_path.replace(os.sep, "/") for rel_path in find_static_files(config.static)
+    }
+
+
+def expected_outputs(config):
+    paths = set(manifest_filenames) | static_outputs(config)
+    for _, dest_path in find_pages(config.content, config.public):
+        rel_path = os.path.relpath(dest_path, config.public)
+        paths.add(rel_path.replace(os.sep, "/"))
+    return paths
@@ -0,0 +1,250 @@
+import datetime
+import hashlib
+import os
+import re
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from manifest import load_manifest, remove_output, save_manifest
+from output import write_if_changed
+
+
+SITE_INDEX_MANIFEST_FILENAME = ".index-manifest.json"
+SITEMAP_FILENAME = "sitemap.xml"
+FEED_FILENAME = "feed.xml"
+FEED_LIMIT = 20
+TAG_SLUG_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+def page_url(rel_path):
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[: -len("index.html")]
+    return "/" + rel_path
+
+
+def tag_slug(tag):
+    # tags with no ASCII letters or digits get a stable hash for a slug
+    slug = TAG_SLUG_PATTERN.sub("-", tag.lower()).strip("-")
+    if slug == "":
+        slug = "tag-" + hashlib.sha1(tag.encode("utf-8")).hexdigest()[:8]
+    return slug
+
+
+def tag_slugs(tags):
+    # tags whose slugs collide, like "C" and "C++", are suffixed -2, -3, ...
+    # in sorted order so every tag keeps its own page
+    slugs = {}
+    used = set()
+    for tag in sorted(tags):
+        base = tag_slug(tag)
+        slug = base
+        suffix = 1
+        while slug in used:
+            suffix += 1
+            slug = f"{base}-{suffix}"
+        used.add(slug)
+        slugs[tag] = slug
+    return slugs
+
+
+class SiteIndex:
+    def __init__(self, dest_dir_path):
+        self.dest_dir_path = dest_dir_path
+        self.pages = {}
+        self.published = []
+        self.sections = {}
+        self.tags = {}
+        self.tag_slugs = {}
+        self.years = {}
+
+    def page_path(self, dest_path):
+        rel_path = os.path.relpath(dest_path, self.dest_dir_path)
+        return rel_path.replace(os.sep, "/")
+
+    def add(self, dest_path, source, meta):
+        self.pages[self.page_path(dest_path)] = (source, meta)
+
+    def remove(self, dest_path):
+        self.pages.pop(self.page_path(dest_path), None)
+
+    def meta_for(self, dest_path):
+        page = self.pages.get(self.page_path(dest_path))
+        if page is None:
+            return None
+        return page[1]
+
+    def build(self):
+        # groupings are computed once, newest first, undated pages last
+        entries = []
+        for rel_path, (source, meta) in sorted(self.pages.items()):
+            if meta.get("draft"):
+                continue
+            entries.append(
+                {
+                    "path": rel_path,
+                    "url": page_url(rel_path),
+                    "source": source,
+                    "title": meta.get("title", ""),
+                    "date": meta.get("date"),
+                    "tags": meta.get("tags", []),
+                }
+            )
+        entries.sort(key=lambda entry: entry["date"] or "", reverse=True)
+        self.published = entries
+        self.sections = {}
+        self.tags = {}
+        self.years = {}
+        for entry in entries:
+            parts = entry["path"].split("/")
+            if len(parts) > 1 and entry["path"] != f"{parts[0]}/index.html":
+                self.sections.setdefault(parts[0], []).append(entry)
+            for tag in entry["tags"]:
+                self.tags.setdefault(tag, []).append(entry)
+            if entry["date"] is not None:
+                self.years.setdefault(entry["date"][:4], []).append(entry)
+        self.tag_slugs = tag_slugs(self.tags)
+
+
+def render_listing(entries):
+    # entries are newest first, so each year's pages are already contiguous
+    parts = []
+    year = None
+    for entry in entries:
+        entry_year = None if entry["date"] is None else entry["date"][:4]
+        if entry_year != year or not parts:
+            if parts:
+                parts.append("</ul>")
+            if entry_year is not None:
+                parts.append(f"<h2>{entry_year}</h2>")
+            parts.append("<ul>")
+            year = entry_year
+        item = f'<li><a href="{entry["url"]}">{entry["title"]}</a>'
+        if entry["date"] is not None:
+            item += f' <time datetime="{entry["date"]}">{entry["date"]}</time>'
+        parts.append(item + "</li>")
+    if parts:
+        parts.append("</ul>")
+    return "".join(parts)
+
+
+def render_tag_index(index):
+    items = "".join(
+        f'<li><a href="/tags/{index.tag_slugs[tag]}/">{tag}</a> ({len(entries)})</li>'
+        for tag, entries in sorted(index.tags.items())
+    )
+    return f"<ul>{items}</ul>"
+
+
+def render_page(template, title, listing):
+    content = f"<div><h1>{title}</h1>{listing}</div>"
+    return template.render(Title=title, Content=content, TOC="")
+
+
+def absolute_url(site_url, basepath, url):
+    return site_url.rstrip("/") + basepath.rstrip("/") + url
+
+
+def render_sitemap(index, site_url, basepath, extra_urls=()):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for entry in index.published:
+        lines.append("  <url>")
+        lines.append(
+            f"    <loc>{escape(absolute_url(site_url, basepath, entry['url']))}</loc>"
+        )
+        if entry["date"] is not None:
+            lines.append(f"    <lastmod>{entry['date']}</lastmod>")
+        lines.append("  </url>")
+    for url in extra_urls:
+        lines.append(
+            f"  <url><loc>{escape(absolute_url(site_url, basepath, url))}</loc></url>"
+        )
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def render_feed(index, site_url, basepath, title):
+    home = absolute_url(site_url, basepath, "/")
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0">',
+        "<channel>",
+        f"  <title>{escape(title)}</title>",
+        f"  <link>{escape(home)}</link>",
+        f"  <description>{escape(title)}</description>",
+    ]
+    dated = [entry for entry in index.published if entry["date"] is not None]
+    for entry in dated[:FEED_LIMIT]:
+        link = escape(absolute_url(site_url, basepath, entry["url"]))
+        published = datetime.datetime.fromisoformat(entry["date"]).replace(
+            tzinfo=datetime.timezone.utc
+        )
+        lines.append("  <item>")
+        lines.append(f"    <title>{escape(entry['title'])}</title>")
+        lines.append(f"    <link>{link}</link>")
+        lines.append(f"    <guid>{link}</guid>")
+        lines.append(f"    <pubDate>{format_datetime(published)}</pubDate>")
+        for tag in entry["tags"]:
+            lines.append(f"    <category>{escape(tag)}</category>")
+        lines.append("  </item>")
+    lines.append("</channel>")
+    lines.append("</rss>")
+    return "\n".join(lines) + "\n"
+
+
+def add_output(outputs, rel_path, text):
+    # a section named like the tags directory would otherwise silently
+    # replace the tag index
+    if rel_path in outputs:
+        raise ValueError(f"two listings would be written to {rel_path}")
+    outputs[rel_path] = text
+
+
+def write_site_index(index, template, basepath="/", site_url=None, verbose=True):
+    # renders every listing, the sitemap and the feed from the in-memory
+    # index in one batch; returns the paths written, relative to the index
+    index.build()
+    outputs = {}
+    for section, entries in sorted(index.sections.items()):
+        rel_path = f"{section}/index.html"
+        if rel_path not in index.pages:
+            listing = render_listing(entries)
+            add_output(outputs, rel_path, render_page(template, section, listing))
+    if index.tags:
+        if "tags/index.html" not in index.pages:
+            listing = render_tag_index(index)
+            add_output(
+                outputs, "tags/index.html", render_page(template, "Tags", listing)
+            )
+        for tag, entries in sorted(index.tags.items()):
+            rel_path = f"tags/{index.tag_slugs[tag]}/index.html"
+            if rel_path not in index.pages:
+                listing = render_listing(entries)
+                add_output(outputs, rel_path, render_page(template, tag, listing))
+    if site_url is not None:
+        listing_urls = [page_url(rel_path) for rel_path in outputs]
+        outputs[SITEMAP_FILENAME] = render_sitemap(
+            index, site_url, basepath, listing_urls
+        )
+        home = index.pages.get("index.html")
+        title = site_url if home is None else home[1].get("title", site_url)
+        outputs[FEED_FILENAME] = render_feed(index, site_url, basepath, title)
+
+    manifest_path = os.path.join(index.dest_dir_path, SITE_INDEX_MANIFEST_FILENAME)
+    old_outputs = load_manifest(manifest_path).get("outputs", [])
+    for rel_path, text in outputs.items():
+        dest_path = os.path.join(index.dest_dir_path, rel_path)
+        if write_if_changed(dest_path, text) and verbose:
+            print(f" * {dest_path}")
+    for rel_path in old_outputs:
+        if rel_path not in outputs and rel_path not in index.pages:
+            dest_path = os.path.join(index.dest_dir_path, rel_path)
+            if verbose:
+                print(f" * removing {dest_path}")
+            remove_output(dest_path, index.dest_dir_path)
+    save_manifest(manifest_path, {"outputs": sorted(outputs)})
+    return sorted(outputs)
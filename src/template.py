@@ -0,0 +1,99 @@
+import io
+import re
+from urllib.parse import unquote
+
+
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+ROOT_URL_PATTERN = re.compile(r'(href|src)="/')
+IMG_PATTERN = re.compile(r'<img src="([^"]*)"')
+
+
+class Template:
+    def __init__(self, text, basepath="/", images=None):
+        self.basepath = basepath
+        self.images = images
+        self.segments = []
+        self.slots = []
+        pos = 0
+        for match in SLOT_PATTERN.finditer(text):
+            self.segments.append(self.rewrite_urls(text[pos : match.start()]))
+            self.slots.append((match.group(1), match.group(0)))
+            pos = match.end()
+        self.segments.append(self.rewrite_urls(text[pos:]))
+
+    def rewrite_urls(self, text):
+        if self.basepath == "/":
+            return text
+        return ROOT_URL_PATTERN.sub(self._replace_root_url, text)
+
+    def _replace_root_url(self, match):
+        return f'{match.group(1)}="{self.basepath}'
+
+    def size_images(self, html):
+        if self.images is None:
+            return html
+        return IMG_PATTERN.sub(self._replace_img, html)
+
+    def _replace_img(self, match):
+        size = self.images.get(unquote(match.group(1)))
+        if size is None:
+            return f'{match.group(0)} loading="lazy"'
+        return f'{match.group(0)} width="{size[0]}" height="{size[1]}" loading="lazy"'
+
+    def render(self, **values):
+        stream = io.StringIO()
+        self.write(stream, **values)
+        return stream.getvalue()
+
+    def write(self, stream, **values):
+        stream.write(self.segments[0])
+        for (name, placeholder), segment in zip(self.slots, self.segments[1:]):
+            value = values.get(name)
+            if value is None:
+                stream.write(placeholder)
+            elif isinstance(value, str):
+                stream.write(self.rewrite_urls(self.size_images(value)))
+            elif self.basepath == "/" and self.images is None:
+                value.write_html(stream)
+            else:
+                writer = RootUrlWriter(stream, self)
+                value.write_html(writer)
+                writer.flush()
+            stream.write(segment)
+
+    def __repr__(self):
+        return f"Template({[name for name, _ in self.slots]}, {self.basepath})"
+
+
+class RootUrlWriter:
+    # holds back just enough of each chunk that an href="/ or src="/ split
+    # across two writes is still rewritten; image tags are sized per chunk
+    # since a leaf node always writes its whole tag at once
+    def __init__(self, stream, template):
+        self.stream = stream
+        self.template = template
+        self.pending = ""
+
+    def write(self, text):
+        text = self.pending + self.template.size_images(text)
+        cut = len(text) - 6
+        if cut <= 0:
+            self.pending = text
+            return
+        for match in ROOT_URL_PATTERN.finditer(text, max(cut - 6, 0)):
+            if match.start() >= cut:
+                break
+            if match.end() > cut:
+                cut = match.start()
+                break
+        self.stream.write(self.template.rewrite_urls(text[:cut]))
+        self.pending = text[cut:]
+
+    def flush(self):
+        self.stream.write(self.template.rewrite_urls(self.pending))
+        self.pending = ""
+
+
+def load_template(template_path, basepath="/", images=None):
+    with open(template_path, "r", encoding="utf-8") as f:
+        return Template(f.read(), basepath, images)
@@ -0,0 +1,61 @@
+import unittest
+
+from blockcache import BlockCache
+from markdown_blocks import markdown_to_html_node
+
+
+MARKDOWN = """
+# Title
+
+A **bold** paragraph
+
+- a list
+- of _items_
+
+```
+some code
+```
+"""
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_same_output_as_uncached(self):
+        cache = BlockCache()
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(cache.misses, 4)
+        self.assertEqual(cache.hits, 4)
+
+    def test_only_changed_block_rerendered(self):
+        cache = BlockCache()
+        markdown_to_html_node(MARKDOWN, cache)
+        edited = MARKDOWN.replace("A **bold** paragraph", "An edited paragraph")
+        html = markdown_to_html_node(edited, cache).to_html()
+        self.assertIn("<p>An edited paragraph</p>", html)
+        self.assertEqual(cache.misses, 5)
+        self.assertEqual(cache.hits, 3)
+
+    def test_evicts_least_recently_used(self):
+        cache = BlockCache(max_entries=2)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        cache.get("a")
+        cache.put("c", "<p>c</p>")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+
+    def test_evicts_by_size(self):
+        cache = BlockCache(max_bytes=10)
+        cache.put("a", "x" * 6)
+        cache.put("b", "y" * 6)
+        self.assertEqual(list(cache.entries), ["b"])
+        self.assertEqual(cache.size, 6)
+
+    def test_key_depends_on_text(self):
+        cache = BlockCache()
+        self.assertEqual(cache.key("same"), cache.key("same"))
+        self.assertNotEqual(cache.key("same"), cache.key("other"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+from buildreport import BuildReport, phase
+
+
+class TestBuildReport(unittest.TestCase):
+    def page(self, source, wall):
+        return {
+            "source": source,
+            "read": wall / 4,
+            "parse": wall / 4,
+            "render": wall / 4,
+            "write": wall / 4,
+            "wall": wall,
+        }
+
+    def test_phase_accumulates(self):
+        report = BuildReport()
+        with report.phase("walk"):
+            pass
+        with report.phase("walk"):
+            pass
+        self.assertEqual(report.phases["walk"]["count"], 2)
+        self.assertIn("cpu", report.phases["walk"])
+
+    def test_phase_records_allocations_when_tracing(self):
+        report = BuildReport()
+        tracemalloc.start()
+        try:
+            with report.phase("parse"):
+                data = [str(i) for i in range(1000)]
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(report.phases["parse"]["allocated"], 0)
+        self.assertEqual(len(data), 1000)
+
+    def test_phase_helper_without_report(self):
+        with phase(None, "static"):
+            pass
+
+    def test_slowest_pages_and_json(self):
+        report = BuildReport()
+        report.add_page(self.page("a.md", 0.001))
+        report.add_page(self.page("b.md", 0.010))
+        report.add_page(self.page("c.md", 0.005))
+        self.assertEqual(
+            [page["source"] for page in report.slowest_pages(2)], ["b.md", "c.md"]
+        )
+        self.assertIn("b.md", report.summary())
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "report.json")
+            report.write(path)
+            with open(path) as f:
+                data = json.load(f)
+        self.assertEqual(data["phases"]["page.parse"]["count"], 3)
+        self.assertEqual(len(data["pages"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import gzip
+import os
+import unittest
+
+from compress import (
+    COMPRESS_MANIFEST_FILENAME,
+    compress_outputs,
+    compressed_variants,
+)
+from testsupport import TempDirTestCase
+
+
+class TestCompressOutputs(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = self.root
+        self.html = "<p>" + "the road goes ever on " * 50 + "</p>"
+        self.write("index.html", self.html)
+        self.write("images/a.png", "png-bytes" * 50)
+        self.write("tiny.css", "a{}")
+
+    def exists(self, rel_path):
+        return os.path.exists(os.path.join(self.public, rel_path))
+
+    def test_writes_gzip_variants(self):
+        compress_outputs(self.public, verbose=False)
+        with gzip.open(os.path.join(self.public, "index.html.gz"), "rt") as f:
+            self.assertEqual(f.read(), self.html)
+        self.assertFalse(self.exists("images/a.png.gz"))
+        self.assertFalse(self.exists("tiny.css.gz"))
+        self.assertTrue(self.exists(COMPRESS_MANIFEST_FILENAME))
+
+    def test_skips_unchanged_files(self):
+        self.assertEqual(compress_outputs(self.public, verbose=False), [
+            "index.html",
+            "tiny.css",
+        ])
+        self.assertEqual(compress_outputs(self.public, verbose=False), [])
+        os.utime(os.path.join(self.public, "index.html"), ns=(1, 1))
+        self.assertEqual(compress_outputs(self.public, verbose=False), [])
+        self.write("index.html", self.html + "!")
+        self.assertEqual(compress_outputs(self.public, verbose=False), ["index.html"])
+
+    def test_removes_variants_of_deleted_files(self):
+        compress_outputs(self.public, verbose=False)
+        os.remove(os.path.join(self.public, "index.html"))
+        compress_outputs(self.public, verbose=False)
+        self.assertFalse(self.exists("index.html.gz"))
+
+    def test_compressed_variants(self):
+        self.assertIn("index.html.gz", compressed_variants(["index.html", "a.png"]))
+        self.assertNotIn("a.png.gz", compressed_variants(["index.html", "a.png"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
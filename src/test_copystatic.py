@@ -0,0 +1,84 @@
+import os
+import unittest
+from unittest import mock
+
+import copystatic
+from copystatic import STATIC_MANIFEST_FILENAME, sync_files_recursive
+from testsupport import TempDirTestCase
+
+
+class TestSyncFilesRecursive(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "docs")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png-bytes")
+        self.write(os.path.join(self.static, "images", "b.png"), "png-bytes")
+
+    def read(self, *parts):
+        with open(os.path.join(self.public, *parts)) as f:
+            return f.read()
+
+    def test_copies_tree(self):
+        sync_files_recursive(self.static, self.public)
+        self.assertEqual(self.read("index.css"), "body {}")
+        self.assertEqual(self.read("images", "a.png"), "png-bytes")
+        self.assertTrue(
+            os.path.exists(os.path.join(self.public, STATIC_MANIFEST_FILENAME))
+        )
+
+    def test_skips_unchanged_files(self):
+        sync_files_recursive(self.static, self.public)
+        dest = os.path.join(self.public, "index.css")
+        inode = os.stat(dest).st_ino
+        sync_files_recursive(self.static, self.public)
+        self.assertEqual(os.stat(dest).st_ino, inode)
+
+    def test_recopies_changed_files(self):
+        sync_files_recursive(self.static, self.public)
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        sync_files_recursive(self.static, self.public)
+        self.assertEqual(self.read("index.css"), "body { color: red }")
+
+    def test_removes_only_stale_outputs(self):
+        sync_files_recursive(self.static, self.public)
+        self.write(os.path.join(self.public, "index.html"), "generated page")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        os.remove(os.path.join(self.static, "images", "b.png"))
+        sync_files_recursive(self.static, self.public)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertEqual(self.read("index.html"), "generated page")
+
+    def test_checksum_deduplicates(self):
+        sync_files_recursive(self.static, self.public, checksum=True)
+        a = os.stat(os.path.join(self.public, "images", "a.png"))
+        b = os.stat(os.path.join(self.public, "images", "b.png"))
+        self.assertEqual((a.st_dev, a.st_ino), (b.st_dev, b.st_ino))
+
+    def test_checksum_skips_deduplicated_files_without_hashing(self):
+        os.utime(os.path.join(self.static, "images", "a.png"), ns=(1, 1))
+        os.utime(os.path.join(self.static, "images", "b.png"), ns=(2, 2))
+        sync_files_recursive(self.static, self.public, checksum=True, verbose=False)
+        dest = os.path.join(self.public, "images", "b.png")
+        before = os.stat(dest)
+        with mock.patch("copystatic.hash_file", wraps=copystatic.hash_file) as hashed:
+            for _ in range(2):
+                sync_files_recursive(
+                    self.static, self.public, checksum=True, verbose=False
+                )
+        hashed.assert_not_called()
+        after = os.stat(dest)
+        self.assertEqual(
+            (after.st_ino, after.st_mtime_ns), (before.st_ino, before.st_mtime_ns)
+        )
+
+    def test_hardlink(self):
+        sync_files_recursive(self.static, self.public, hardlink=True)
+        src = os.stat(os.path.join(self.static, "index.css"))
+        dest = os.stat(os.path.join(self.public, "index.css"))
+        self.assertEqual(src.st_ino, dest.st_ino)
+
+
+if __name__ == "__main__":
+    unittest.main()
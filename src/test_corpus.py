@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+
+from corpus import SHAPES, generate_corpus
+from markdown_blocks import markdown_to_html_node
+
+
+class TestGenerateCorpus(unittest.TestCase):
+    def test_deterministic(self):
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            paths_a = generate_corpus(a, 5, "links", size=4, seed=7)
+            paths_b = generate_corpus(b, 5, "links", size=4, seed=7)
+            for path_a, path_b in zip(paths_a, paths_b):
+                self.assertEqual(os.path.relpath(path_a, a), os.path.relpath(path_b, b))
+                with open(path_a) as fa, open(path_b) as fb:
+                    self.assertEqual(fa.read(), fb.read())
+
+    def test_shapes_render(self):
+        with tempfile.TemporaryDirectory() as root:
+            for shape in SHAPES:
+                for path in generate_corpus(os.path.join(root, shape), 3, shape, 5):
+                    with open(path) as f:
+                        markdown_to_html_node(f.read()).to_html()
+
+    def test_invalid_shape(self):
+        with tempfile.TemporaryDirectory() as root:
+            with self.assertRaises(ValueError):
+                generate_corpus(root, 1, "tables")
+
+
+if __name__ == "__main__":
+    unittest.main()
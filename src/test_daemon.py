@@ -0,0 +1,68 @@
+import contextlib
+import io
+import os
+import threading
+import unittest
+
+from buildclient import parse_setting, request_build
+from daemon import BuildServer
+from sitebuild import BuildConfig
+from testsupport import TempDirTestCase
+
+
+class TestDaemon(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        config = BuildConfig(
+            static=os.path.join(self.root, "static"),
+            public=os.path.join(self.root, "docs"),
+            content=os.path.join(self.root, "content"),
+            template=os.path.join(self.root, "template.html"),
+            incremental=True,
+            verbose=False,
+        )
+        os.makedirs(config.static)
+        self.write(config.template, "{{ Content }}")
+        self.write(os.path.join(config.content, "index.md"), "# Home")
+        self.socket_path = os.path.join(self.root, "build.sock")
+        self.server = BuildServer(self.socket_path, config)
+        self.addCleanup(self.server.server_close)
+        thread = threading.Thread(target=self.serve)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.shutdown)
+
+    def serve(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.server.serve_forever()
+
+    def test_builds_on_request(self):
+        result = request_build(self.socket_path, timeout=10)
+        self.assertTrue(result["ok"])
+        self.assertEqual(result["changes"]["added"], ["index.html"])
+        result = request_build(self.socket_path, timeout=10, basepath="/site/")
+        self.assertEqual(result["changes"]["added"], [])
+        self.assertEqual(self.server.config.basepath, "/")
+
+    def test_invalid_request(self):
+        result = request_build(self.socket_path, timeout=10, colour="red")
+        self.assertFalse(result["ok"])
+        self.assertIn("invalid request", result["error"])
+
+    def test_failed_build_still_replies(self):
+        result = request_build(self.socket_path, timeout=10, content="/nonexistent")
+        self.assertFalse(result["ok"])
+        self.assertIn("FileNotFoundError", result["error"])
+        self.assertTrue(request_build(self.socket_path, timeout=10)["ok"])
+
+    def test_refuses_a_live_socket(self):
+        with self.assertRaises(RuntimeError):
+            BuildServer(self.socket_path, self.server.config)
+
+    def test_parse_setting(self):
+        self.assertEqual(parse_setting("search=true"), ("search", True))
+        self.assertEqual(parse_setting("site-url=https://x"), ("site_url", "https://x"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import unittest
+
+from depgraph import DependencyGraph, changed_inputs, fingerprint_inputs
+from testsupport import TempDirTestCase
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def test_affected_follows_edges(self):
+        graph = DependencyGraph(
+            {
+                "a.html": ["a.md", "template.html"],
+                "b.html": ["b.md", "template.html"],
+                "blog.html": ["a.html"],
+            }
+        )
+        self.assertEqual(graph.affected({"b.md"}), {"b.html"})
+        self.assertEqual(graph.affected({"a.md"}), {"a.html", "blog.html"})
+        self.assertEqual(
+            graph.affected({"template.html"}), {"a.html", "b.html", "blog.html"}
+        )
+        self.assertEqual(graph.affected({"c.md"}), set())
+
+    def test_add_replaces_edges(self):
+        graph = DependencyGraph({"a.html": ["a.md", "x.png"]})
+        graph.add("a.html", ["a.md"])
+        self.assertEqual(graph.affected({"x.png"}), set())
+        self.assertEqual(graph.inputs(), {"a.md"})
+        graph.remove("a.html")
+        self.assertEqual(graph.to_dict(), {})
+        self.assertNotIn("a.html", graph)
+
+    def test_round_trip(self):
+        edges = {"a.html": ["a.md", "config:basepath"]}
+        self.assertEqual(DependencyGraph(edges).to_dict(), edges)
+
+
+class TestFingerprints(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.write("a.md", "# A")
+
+    def test_touch_is_not_a_change(self):
+        nodes = [self.path, "config:basepath"]
+        old = fingerprint_inputs(nodes, {}, {"config:basepath": "/"})
+        os.utime(self.path, ns=(1, 1))
+        new = fingerprint_inputs(nodes, old, {"config:basepath": "/"})
+        self.assertEqual(changed_inputs(old, new), set())
+
+    def test_changes(self):
+        old = fingerprint_inputs([self.path], {}, {})
+        old["config:basepath"] = "/"
+        with open(self.path, "w") as f:
+            f.write("# B")
+        missing = os.path.join(self.root, "b.md")
+        nodes = [self.path, missing, "config:basepath"]
+        new = fingerprint_inputs(nodes, old, {"config:basepath": "/site/"})
+        self.assertIsNone(new[missing])
+        self.assertEqual(
+            changed_inputs(old, new), {self.path, missing, "config:basepath"}
+        )
+
+    def test_reuses_hash_when_stat_matches(self):
+        old = fingerprint_inputs([self.path])
+        old[self.path]["sha256"] = "cached"
+        new = fingerprint_inputs([self.path], old)
+        self.assertEqual(new[self.path]["sha256"], "cached")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import unittest
+from unittest import mock
+
+import gencontent
+from devserver import (
+    RELOAD_SCRIPT,
+    SiteBuilder,
+    diff_snapshots,
+    inject_reload_script,
+    snapshot,
+)
+from sitebuild import BuildConfig
+from testsupport import TempDirTestCase
+
+
+class TestDevServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<body>{{ Content }}</body>")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "about", "index.md"), "# About")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        config = BuildConfig(
+            static=self.static,
+            public=self.public,
+            content=self.content,
+            template=self.template,
+            verbose=False,
+        )
+        self.builder = SiteBuilder(config)
+        self.builder.rebuild({os.path.normpath(self.template), self.static_file()})
+
+    def static_file(self):
+        return os.path.normpath(os.path.join(self.static, "index.css"))
+
+    def output(self, *parts):
+        return os.path.join(self.public, *parts)
+
+    def test_inject_reload_script(self):
+        self.assertEqual(
+            inject_reload_script("<body><p>x</p></body>"),
+            f"<body><p>x</p>{RELOAD_SCRIPT}</body>",
+        )
+
+    def test_snapshot_diff(self):
+        before = snapshot(self.builder.watched_paths())
+        path = os.path.join(self.content, "about", "index.md")
+        self.write(path, "# About us")
+        os.utime(path, ns=(1, 1))
+        after = snapshot(self.builder.watched_paths())
+        self.assertEqual(diff_snapshots(before, after), {os.path.normpath(path)})
+
+    def test_rebuild_only_changed_page(self):
+        os.utime(self.output("index.html"), ns=(1, 1))
+        about = os.path.join(self.content, "about", "index.md")
+        self.write(about, "# About\n\nnew text")
+        self.builder.rebuild({os.path.normpath(about)})
+        with open(self.output("about", "index.html")) as f:
+            self.assertIn("new text", f.read())
+        self.assertEqual(os.stat(self.output("index.html")).st_mtime_ns, 1)
+        self.assertEqual(self.builder.generation, 2)
+
+    def test_rebuild_fingerprints_only_changed_files(self):
+        about = os.path.join(self.content, "about", "index.md")
+        self.write(about, "# About\n\nnew text")
+        with mock.patch(
+            "gencontent.fingerprint_inputs", wraps=gencontent.fingerprint_inputs
+        ) as fingerprint:
+            self.builder.rebuild({os.path.normpath(about)})
+        files = {
+            node
+            for call in fingerprint.call_args_list
+            for node in call.args[0]
+            if os.path.isabs(node)
+        }
+        self.assertEqual(files, {os.path.abspath(about)})
+        with open(self.output("about", "index.html")) as f:
+            self.assertIn("new text", f.read())
+
+    def test_rebuild_removed_page(self):
+        about = os.path.join(self.content, "about", "index.md")
+        os.remove(about)
+        self.builder.rebuild({os.path.normpath(about)})
+        self.assertFalse(os.path.exists(self.output("about")))
+
+    def test_static_change_is_synced(self):
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        self.builder.rebuild({self.static_file()})
+        with open(self.output("index.css")) as f:
+            self.assertEqual(f.read(), "body { margin: 0 }")
+
+    def test_listings_follow_new_pages(self):
+        post = os.path.join(self.content, "blog", "post", "index.md")
+        self.write(post, "---\ndate: 2024-01-01\n---\n\n# New post")
+        self.builder.rebuild({os.path.normpath(post)})
+        with open(self.output("blog", "index.html")) as f:
+            self.assertIn("New post", f.read())
+
+    def test_new_image_rebuilds_pages_showing_it(self):
+        about = os.path.join(self.content, "about", "index.md")
+        self.write(about, "# About\n\n![x](/x.gif)")
+        self.builder.rebuild({os.path.normpath(about)})
+        os.utime(self.output("index.html"), ns=(1, 1))
+        os.utime(self.output("about", "index.html"), ns=(1, 1))
+        image = os.path.join(self.static, "x.gif")
+        with open(image, "wb") as f:
+            f.write(b"GIF89a\x03\x00\x02\x00")
+        self.builder.rebuild({os.path.normpath(image)})
+        with open(self.output("about", "index.html")) as f:
+            self.assertIn('width="3" height="2"', f.read())
+        self.assertEqual(os.stat(self.output("index.html")).st_mtime_ns, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from frontmatter import is_front_matter, parse_front_matter
+from markdown_blocks import markdown_to_page
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_parse(self):
+        block = (
+            "---\n"
+            'title: "Tom, revisited"\n'
+            "date: 2024-03-01\n"
+            "tags: [lotr, 'characters', lotr]\n"
+            "draft: yes\n"
+            "summary: a mistake\n"
+            "---"
+        )
+        self.assertTrue(is_front_matter(block))
+        self.assertEqual(
+            parse_front_matter(block),
+            {
+                "title": "Tom, revisited",
+                "date": "2024-03-01",
+                "tags": ["lotr", "characters"],
+                "draft": True,
+                "summary": "a mistake",
+            },
+        )
+
+    def test_not_front_matter(self):
+        self.assertFalse(is_front_matter("---"))
+        self.assertFalse(is_front_matter("---\ntitle: x"))
+        self.assertTrue(is_front_matter("---\n---"))
+
+    def test_invalid_values(self):
+        for line in ("date: March", "draft: maybe", "no separator"):
+            with self.assertRaises(ValueError):
+                parse_front_matter(f"---\n{line}\n---")
+
+    def test_markdown_to_page(self):
+        md = "---\ntags: a, b\n---\n\n# Hello\n\nbody"
+        meta, node = markdown_to_page(md)
+        self.assertEqual(meta["tags"], ["a", "b"])
+        self.assertEqual(meta["title"], "Hello")
+        self.assertEqual(
+            node.to_html(), '<div><h1 id="hello">Hello</h1><p>body</p></div>'
+        )
+
+    def test_front_matter_title_wins(self):
+        meta, _ = markdown_to_page("---\ntitle: Set\n---\n\n# Heading")
+        self.assertEqual(meta["title"], "Set")
+
+    def test_front_matter_only_at_start(self):
+        meta, node = markdown_to_page("# Title\n\n---\ndate: x\n---")
+        self.assertEqual(meta["title"], "Title")
+        self.assertNotIn("date", meta)
+        self.assertIn("date: x", node.to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,18 @@
+import os
 import unittest
+from functools import partial
+from unittest import mock
 
-from gencontent import extract_title
+from gencontent import (
+    MANIFEST_FILENAME,
+    PageBuildError,
+    extract_title,
+    generate_pages_incremental,
+    generate_pages_recursive,
+)
+from manifest import load_manifest
+from pipeline import BackgroundWriter
+from testsupport import TempDirTestCase
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -46,6 +58,193 @@ no title
             pass
 
 
+class TestGeneratePagesIncremental(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(
+            self.template,
+            '<title>{{ Title }}</title><link href="/index.css">{{ Content }}',
+        )
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+
+    def build(self, basepath="/", images=None):
+        generate_pages_incremental(
+            self.content, self.template, self.public, basepath, images=images
+        )
+
+    def mtimes(self):
+        return {
+            "home": os.stat(os.path.join(self.public, "index.html")).st_mtime_ns,
+            "post": os.stat(
+                os.path.join(self.public, "blog", "post", "index.html")
+            ).st_mtime_ns,
+        }
+
+    def test_records_manifest(self):
+        self.build()
+        manifest = load_manifest(os.path.join(self.public, MANIFEST_FILENAME))
+        self.assertEqual(
+            sorted(manifest["graph"]),
+            [os.path.join("blog", "post", "index.html"), "index.html"],
+        )
+        self.assertEqual(
+            manifest["graph"]["index.html"],
+            sorted(
+                [
+                    "config:basepath",
+                    "config:version",
+                    os.path.join("..", "content", "index.md"),
+                    os.path.join("..", "template.html"),
+                ]
+            ),
+        )
+
+    def test_skips_unchanged_pages(self):
+        self.build()
+        before = self.mtimes()
+        os.utime(os.path.join(self.public, "index.html"), ns=(1, 1))
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Edited")
+        self.build()
+        after = self.mtimes()
+        self.assertEqual(after["home"], 1)
+        self.assertNotEqual(after["post"], before["post"])
+
+    def test_basepath_change_rebuilds(self):
+        self.build()
+        os.utime(os.path.join(self.public, "index.html"), ns=(1, 1))
+        self.build("/site/")
+        self.assertNotEqual(self.mtimes()["home"], 1)
+
+    def test_image_size_change_rebuilds_pages_showing_it(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![a](/a.png)")
+        self.build(images={"/a.png": (1, 1)})
+        for path in ("index.html", os.path.join("blog", "post", "index.html")):
+            os.utime(os.path.join(self.public, path), ns=(1, 1))
+        self.build(images={"/a.png": (1, 1), "/b.png": (2, 2)})
+        self.assertEqual(self.mtimes(), {"home": 1, "post": 1})
+        self.build(images={"/a.png": (3, 3), "/b.png": (2, 2)})
+        self.assertEqual(self.mtimes()["post"], 1)
+        self.assertNotEqual(self.mtimes()["home"], 1)
+
+    def test_template_touch_without_change_skips(self):
+        self.build()
+        os.utime(os.path.join(self.public, "index.html"), ns=(1, 1))
+        os.utime(self.template, ns=(5, 5))
+        self.build()
+        self.assertEqual(self.mtimes()["home"], 1)
+
+    def test_manifest_does_not_depend_on_working_directory(self):
+        self.build()
+        os.utime(os.path.join(self.public, "index.html"), ns=(1, 1))
+        outside = os.path.join(self.root, "elsewhere")
+        self.write(os.path.join(outside, "docs", "index.html"), "keep")
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+        generate_pages_incremental("content", "template.html", "docs", "/")
+        os.chdir(outside)
+        generate_pages_incremental(self.content, self.template, self.public, "/")
+        self.assertEqual(self.mtimes()["home"], 1)
+        self.assertTrue(os.path.exists(os.path.join(outside, "docs", "index.html")))
+
+    def test_moved_tree_keeps_its_manifest(self):
+        self.build()
+        os.utime(os.path.join(self.public, "index.html"), ns=(1, 1))
+        moved = os.path.join(self.root, "moved")
+        os.makedirs(moved)
+        for name in ("content", "docs", "template.html"):
+            os.rename(os.path.join(self.root, name), os.path.join(moved, name))
+        self.content = os.path.join(moved, "content")
+        self.public = os.path.join(moved, "docs")
+        self.template = os.path.join(moved, "template.html")
+        self.build()
+        self.assertEqual(self.mtimes()["home"], 1)
+
+    def test_outputs_moved_alone_are_rebuilt(self):
+        self.build()
+        restored = os.path.join(self.root, "ci", "docs")
+        os.makedirs(os.path.dirname(restored))
+        os.rename(self.public, restored)
+        self.public = restored
+        self.write(os.path.join(self.content, "index.md"), "# Edited home")
+        self.build()
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("Edited home", f.read())
+
+    def test_failed_background_write_rebuilds_next_time(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Edited home")
+
+        def fail(path, text):
+            raise OSError("disk full")
+
+        writer = partial(BackgroundWriter, write=fail)
+        with mock.patch("gencontent.BackgroundWriter", writer):
+            with self.assertRaises(PageBuildError):
+                generate_pages_incremental(
+                    self.content, self.template, self.public, "/", io_depth=2
+                )
+        self.build()
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("Edited home", f.read())
+
+    def test_removes_deleted_sources(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+
+class TestGeneratePagesParallel(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(6):
+            self.write(
+                os.path.join(self.content, f"page{i}", "index.md"),
+                f"# Page {i}\n\nSome **text** for page {i}",
+            )
+
+    def read_outputs(self, public):
+        outputs = {}
+        for dirpath, _, filenames in os.walk(public):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path) as f:
+                    outputs[os.path.relpath(path, public)] = f.read()
+        return outputs
+
+    def test_matches_sequential_output(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, "/", jobs=1)
+        generate_pages_recursive(self.content, self.template, parallel, "/", jobs=3)
+        self.assertEqual(self.read_outputs(serial), self.read_outputs(parallel))
+        self.assertEqual(len(self.read_outputs(parallel)), 6)
+
+    def test_settings_are_passed_by_name(self):
+        public = os.path.join(self.root, "docs")
+        with self.assertRaises(TypeError):
+            generate_pages_recursive(self.content, self.template, public, "/", 3)
+
+    def test_reports_failures_per_page(self):
+        bad = os.path.join(self.content, "page2", "index.md")
+        with open(bad, "w") as f:
+            f.write("no title here")
+        public = os.path.join(self.root, "docs")
+        with self.assertRaises(PageBuildError) as cm:
+            generate_pages_recursive(self.content, self.template, public, "/", jobs=3)
+        self.assertEqual([path for path, _ in cm.exception.failures], [bad])
+        self.assertEqual(len(self.read_outputs(public)), 5)
+
+
 if __name__ == "__main__":
     unittest.main()
 
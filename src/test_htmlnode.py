@@ -1,3 +1,6 @@
+import copy
+import io
+import pickle
 import unittest
 from htmlnode import LeafNode, ParentNode, HTMLNode
 
@@ -109,6 +112,45 @@ class TestHTMLNode(unittest.TestCase):
         )
 
 
+    def test_write_html_streams_fragments(self):
+        node = ParentNode(
+            "div",
+            [ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")])],
+            {"class": "x"},
+        )
+        stream = io.StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), node.to_html())
+        self.assertEqual(
+            stream.getvalue(), '<div class="x"><p><b>Bold</b> text</p></div>'
+        )
+
+    def test_to_html_deep_tree(self):
+        node = LeafNode(None, "x")
+        for _ in range(200):
+            node = ParentNode("span", [node])
+        self.assertEqual(node.to_html(), "<span>" * 200 + "x" + "</span>" * 200)
+
+
+    def test_leaf_is_immutable(self):
+        node = LeafNode("b", "bold")
+        with self.assertRaises(AttributeError):
+            node.value = "changed"
+        shared = ParentNode("p", [node, node])
+        self.assertEqual(shared.to_html(), "<p><b>bold</b><b>bold</b></p>")
+
+    def test_leaf_pickles_and_copies(self):
+        node = ParentNode("p", [LeafNode("a", "link", {"href": "/"})])
+        for clone in (pickle.loads(pickle.dumps(node)), copy.deepcopy(node)):
+            self.assertEqual(clone.to_html(), '<p><a href="/">link</a></p>')
+        leaf = copy.copy(node.children[0])
+        self.assertEqual(repr(leaf), "LeafNode(a, link, {'href': '/'})")
+
+    def test_nodes_have_no_dict(self):
+        self.assertFalse(hasattr(LeafNode("b", "x"), "__dict__"))
+        self.assertFalse(hasattr(ParentNode("p", []), "__dict__"))
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,95 @@
+import os
+import struct
+import unittest
+
+from imagesize import (
+    IMAGE_MANIFEST_FILENAME,
+    index_images,
+    parse_image_size,
+    read_image_size,
+)
+from testsupport import TempDirTestCase
+
+
+def png(width, height):
+    return (
+        b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+        + struct.pack(">II", width, height)
+        + b"\x08\x06\x00\x00\x00"
+    )
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof = b"\xff\xc2" + struct.pack(">HBHH", 17, 8, height, width) + b"\x03"
+    return b"\xff\xd8" + app0 + sof + b"\x00" * 16
+
+
+class TestParseImageSize(unittest.TestCase):
+    def test_png(self):
+        self.assertEqual(parse_image_size(png(1100, 438)), (1100, 438))
+
+    def test_gif(self):
+        self.assertEqual(
+            parse_image_size(b"GIF89a" + struct.pack("<HH", 20, 10)), (20, 10)
+        )
+
+    def test_jpeg_skips_segments(self):
+        self.assertEqual(parse_image_size(jpeg(640, 480)), (640, 480))
+
+    def test_webp(self):
+        header = b"RIFF\x00\x00\x00\x00WEBP"
+        lossy = header + b"VP8 " + b"\x00" * 7 + b"\x9d\x01\x2a"
+        lossy += struct.pack("<HH", 300, 200)
+        self.assertEqual(parse_image_size(lossy), (300, 200))
+        bits = (300 - 1) | ((200 - 1) << 14)
+        lossless = header + b"VP8L" + b"\x00" * 4 + b"\x2f" + struct.pack("<I", bits)
+        self.assertEqual(parse_image_size(lossless), (300, 200))
+        extended = header + b"VP8X" + b"\x00" * 8
+        extended += (299).to_bytes(3, "little") + (199).to_bytes(3, "little")
+        self.assertEqual(parse_image_size(extended), (300, 200))
+
+    def test_unknown_format(self):
+        self.assertIsNone(parse_image_size(b"not an image"))
+
+
+class TestIndexImages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "docs")
+        self.write("static/images/a.png", png(4, 3))
+        self.write("static/images/empty.png", b"")
+        self.write("static/images/short.webp", b"RIFF\x00\x00\x00\x00WEBPVP8L")
+        self.write("static/images/short.jpg", b"\xff\xd8\xff\xc0\x00\x11")
+        self.write("static/index.css", b"body {}")
+
+    def test_index(self):
+        self.assertEqual(
+            index_images(self.static, self.public), {"/images/a.png": (4, 3)}
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(self.public, IMAGE_MANIFEST_FILENAME))
+        )
+
+    def test_truncated_headers(self):
+        for name in ("short.webp", "short.jpg"):
+            path = os.path.join(self.static, "images", name)
+            self.assertIsNone(read_image_size(path))
+
+    def test_reuses_cached_sizes(self):
+        index_images(self.static, self.public)
+        path = os.path.join(self.static, "images", "a.png")
+        stat = os.stat(path)
+        # same size and mtime: the stale header is not read again
+        self.write(path, png(8, 6))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        images = index_images(self.static, self.public)
+        self.assertEqual(images["/images/a.png"], (4, 3))
+        os.utime(path, ns=(1, 1))
+        images = index_images(self.static, self.public)
+        self.assertEqual(images["/images/a.png"], (8, 6))
+
+
+if __name__ == "__main__":
+    unittest.main()
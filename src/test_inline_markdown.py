@@ -1,9 +1,11 @@
+import random
 import unittest
 from inline_markdown import (
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
     text_to_textnodes,
+    text_to_textnodes_multipass,
     extract_markdown_links,
     extract_markdown_images,
 )
@@ -192,6 +194,34 @@ class TestInlineMarkdown(unittest.TestCase):
         )
 
 
+    def test_text_to_textnodes_matches_multipass(self):
+        pieces = ["**", "_", "`", "![a](b)", "[c](d)", "!", "[", "]", "(", ")", "x", " "]
+        rng = random.Random(0)
+        for _ in range(3000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            try:
+                expected = text_to_textnodes_multipass(text)
+            except ValueError:
+                with self.assertRaises(ValueError, msg=text):
+                    text_to_textnodes(text)
+                continue
+            self.assertListEqual(expected, text_to_textnodes(text), msg=text)
+
+    def test_text_to_textnodes_literal_delimiters(self):
+        self.assertListEqual(
+            [
+                TextNode("snake_case_name", TextType.BOLD),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("a `tick` inside", TextType.ITALIC),
+            ],
+            text_to_textnodes("**snake_case_name** and _a `tick` inside_"),
+        )
+
+    def test_text_to_textnodes_unclosed(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("this is _not closed **bold**")
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,97 @@
+import os
+import unittest
+
+from gencontent import generate_pages_incremental, generate_pages_recursive
+from linkcheck import LinkIndex, extract_links, is_internal, link_targets
+from testsupport import TempDirTestCase
+
+
+class TestLinkCheck(unittest.TestCase):
+    def test_extract_links(self):
+        html = '<p><a href="/blog">b</a><img src="/images/a.png" alt="a"></p>'
+        self.assertEqual(extract_links(html), ["/blog", "/images/a.png"])
+
+    def test_is_internal(self):
+        self.assertTrue(is_internal("/blog"))
+        self.assertTrue(is_internal("../tom"))
+        self.assertFalse(is_internal("https://www.boot.dev"))
+        self.assertFalse(is_internal("mailto:me@example.com"))
+        self.assertFalse(is_internal("#top"))
+
+    def test_link_targets(self):
+        self.assertEqual(link_targets("blog/tom/index.html", "/"), ["index.html"])
+        self.assertEqual(
+            link_targets("index.html", "/blog/tom"),
+            ["blog/tom", "blog/tom/index.html", "blog/tom.html"],
+        )
+        self.assertEqual(
+            link_targets("blog/tom/index.html", "../majesty/#intro"),
+            ["blog/majesty/index.html"],
+        )
+
+    def test_check(self):
+        index = LinkIndex("docs")
+        index.add(
+            os.path.join("docs", "index.html"),
+            "content/index.md",
+            ["/blog/tom", "/images/tom.png", "/missing", "https://example.com"],
+        )
+        known = {"index.html", "blog/tom/index.html", "images/tom.png"}
+        broken = index.check(known)
+        self.assertEqual([link.url for link in broken], ["/missing"])
+        self.assertEqual(broken[0].page, "index.html")
+
+
+class TestLinkIndexDuringBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "{{ Content }}")
+        self.write(
+            os.path.join(self.content, "index.md"),
+            "# Home\n\n[post](/post) and\n[gone](/gone)",
+        )
+        self.write(
+            os.path.join(self.content, "post", "index.md"), "# Post\n\n[home](/)"
+        )
+
+    def test_reports_broken_links_with_lines(self):
+        index = LinkIndex(self.public)
+        generate_pages_recursive(
+            self.content,
+            self.template,
+            self.public,
+            "/",
+            verbose=False,
+            link_index=index,
+        )
+        broken = index.check()
+        self.assertEqual(len(broken), 1)
+        self.assertEqual(broken[0].url, "/gone")
+        self.assertEqual(broken[0].line, 4)
+
+    def build(self, index):
+        generate_pages_incremental(
+            self.content,
+            self.template,
+            self.public,
+            "/",
+            verbose=False,
+            link_index=index,
+        )
+
+    def test_incremental_reuses_recorded_links(self):
+        self.build(LinkIndex(self.public))
+        os.utime(os.path.join(self.public, "index.html"), ns=(1, 1))
+        index = LinkIndex(self.public)
+        self.build(index)
+        home = os.path.join(self.public, "index.html")
+        self.assertEqual(os.stat(home).st_mtime_ns, 1)
+        self.assertEqual(sorted(index.pages), ["index.html", "post/index.html"])
+        self.assertEqual([link.url for link in index.check()], ["/gone"])
+
+
+if __name__ == "__main__":
+    unittest.main()
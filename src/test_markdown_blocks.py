@@ -1,5 +1,9 @@
+import io
+import random
 import unittest
+from unittest import mock
 from markdown_blocks import (
+    iter_blocks,
     markdown_to_html_node,
     markdown_to_blocks,
     block_to_block_type,
@@ -164,6 +168,55 @@ the **same** even with inline stuff
         )
 
 
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        pieces = ["\n", "\n\n", " ", "\t", "a", "# ", "```", "> ", "- ", "1. ", "2. "]
+        rng = random.Random(0)
+        for _ in range(5000):
+            md = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            expected = [
+                (block, block_to_block_type(block)) for block in markdown_to_blocks(md)
+            ]
+            self.assertEqual(list(iter_blocks(md)), expected, msg=repr(md))
+            self.assertEqual(list(iter_blocks(io.StringIO(md))), expected, msg=repr(md))
+            self.assertEqual(list(iter_blocks(md.encode())), expected, msg=repr(md))
+
+    def test_iter_blocks_buffer_translates_crlf(self):
+        md = "# Title\n\nPara one\n\n- a\n- b\n"
+        crlf = md.replace("\n", "\r\n").encode("utf-8")
+        self.assertEqual(list(iter_blocks(crlf)), list(iter_blocks(md)))
+        self.assertEqual(
+            markdown_to_html_node(crlf).to_html(),
+            "<div><h1>Title</h1><p>Para one</p><ul><li>a</li><li>b</li></ul></div>",
+        )
+
+    def test_iter_blocks_buffer_types_while_scanning(self):
+        md = b"# title\n\n- a\n- b\n\n```\ncode\n```"
+        with mock.patch("markdown_blocks.block_to_block_type") as classify:
+            types = [block_type for _, block_type in iter_blocks(md)]
+        classify.assert_not_called()
+        self.assertEqual(types, [BlockType.HEADING, BlockType.ULIST, BlockType.CODE])
+
+    def test_iter_blocks_buffer_decodes_utf8(self):
+        md = "# Título\n\n\u2003> «quote»\u00a0\n\n\n- a\n- ü"
+        expected = [
+            (block, block_to_block_type(block)) for block in markdown_to_blocks(md)
+        ]
+        self.assertEqual(list(iter_blocks(md.encode("utf-8"))), expected)
+        with self.assertRaises(UnicodeDecodeError):
+            list(iter_blocks(b"# title\n\n\xff"))
+
+    def test_iter_blocks_file_object(self):
+        md = "# title\n\n- a\n- b\n\n\n\n```\ncode\n```\n"
+        self.assertEqual(
+            list(iter_blocks(io.StringIO(md))),
+            [
+                ("# title", BlockType.HEADING),
+                ("- a\n- b", BlockType.ULIST),
+                ("```\ncode\n```", BlockType.CODE),
+            ],
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
 
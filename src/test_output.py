@@ -0,0 +1,96 @@
+import os
+import unittest
+
+from manifest import remove_output
+from output import (
+    DEPLOY_MANIFEST_FILENAME,
+    AtomicFile,
+    copy_if_changed,
+    diff_outputs,
+    prune_outputs,
+    update_deploy_manifest,
+    write_if_changed,
+)
+from testsupport import TempDirTestCase
+
+
+class TestOutput(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = os.path.join(self.root, "docs")
+
+    def path(self, *parts):
+        return os.path.join(self.public, *parts)
+
+    def test_write_if_changed_keeps_mtime(self):
+        path = self.path("a", "index.html")
+        self.assertTrue(write_if_changed(path, "<p>one</p>"))
+        os.utime(path, ns=(1, 1))
+        self.assertFalse(write_if_changed(path, "<p>one</p>"))
+        self.assertEqual(os.stat(path).st_mtime_ns, 1)
+        self.assertTrue(write_if_changed(path, "<p>two</p>"))
+        with open(path) as f:
+            self.assertEqual(f.read(), "<p>two</p>")
+        self.assertEqual(os.listdir(self.path("a")), ["index.html"])
+
+    def test_failed_write_leaves_destination(self):
+        path = self.path("index.html")
+        write_if_changed(path, "old")
+        with self.assertRaises(ValueError):
+            with AtomicFile(path) as f:
+                f.write("partial")
+                raise ValueError("render failed")
+        with open(path) as f:
+            self.assertEqual(f.read(), "old")
+        self.assertEqual(os.listdir(self.public), ["index.html"])
+
+    def test_copy_if_changed(self):
+        source = self.write("index.css", "body {}")
+        self.assertTrue(copy_if_changed(source, self.path("index.css")))
+        self.assertFalse(copy_if_changed(source, self.path("index.css")))
+
+    def test_prune_outputs(self):
+        write_if_changed(self.path("index.html"), "home")
+        write_if_changed(self.path("old", "index.html"), "old")
+        removed = prune_outputs(self.public, {"index.html"}, verbose=False)
+        self.assertEqual(removed, ["old/index.html"])
+        self.assertFalse(os.path.exists(self.path("old")))
+
+    def test_remove_output_stays_under_root(self):
+        write_if_changed(self.path("index.html"), "home")
+        with self.assertRaises(ValueError):
+            remove_output(self.path("index.html"), self.path("blog"))
+        self.assertTrue(os.path.exists(self.path("index.html")))
+
+    def test_deploy_manifest_diff(self):
+        write_if_changed(self.path("index.html"), "home")
+        write_if_changed(self.path("about.html"), "about")
+        changes = update_deploy_manifest(self.public)
+        self.assertEqual(changes["added"], ["about.html", "index.html"])
+
+        write_if_changed(self.path("index.html"), "new home")
+        write_if_changed(self.path("blog.html"), "blog")
+        os.remove(self.path("about.html"))
+        changes = update_deploy_manifest(self.public)
+        self.assertEqual(
+            changes,
+            {
+                "added": ["blog.html"],
+                "changed": ["index.html"],
+                "removed": ["about.html"],
+            },
+        )
+        self.assertTrue(os.path.exists(self.path(DEPLOY_MANIFEST_FILENAME)))
+        self.assertEqual(
+            update_deploy_manifest(self.public),
+            {"added": [], "changed": [], "removed": []},
+        )
+
+    def test_diff_ignores_mtime(self):
+        old = {"a.html": {"sha256": "x", "size": 1, "mtime": 1}}
+        new = {"a.html": {"sha256": "x", "size": 1, "mtime": 2}}
+        self.assertEqual(diff_outputs(old, new)["changed"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
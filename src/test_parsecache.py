@@ -0,0 +1,101 @@
+import os
+import pickle
+import sqlite3
+import unittest
+
+from gencontent import generate_pages_recursive
+from parsecache import ParseCache
+from testsupport import TempDirTestCase
+
+
+class TestParseCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.root, "cache", "parse.sqlite")
+        self.cache = ParseCache(self.path, "1")
+        self.addCleanup(self.cache.close)
+
+    def test_get_put(self):
+        key = self.cache.key("# Title")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "Title", "<div></div>", {"tags": ["a"]})
+        self.assertEqual(
+            self.cache.get(key), ("Title", "<div></div>", {"tags": ["a"]})
+        )
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_other_version_misses_and_is_pruned(self):
+        key = self.cache.key("# Title")
+        self.cache.put(key, "Title", "<div></div>")
+        newer = ParseCache(self.path, "2")
+        self.assertIsNone(newer.get(key))
+        self.assertEqual(newer.prune(), 1)
+        self.assertEqual(newer.stats()["entries"], 0)
+
+    def test_prune_by_age(self):
+        self.cache.put("a", "A", "<div></div>")
+        self.assertEqual(self.cache.prune(max_age=3600), 0)
+        self.assertEqual(self.cache.prune(max_age=-1), 1)
+
+    def test_export_import(self):
+        self.cache.put("a", "A", "<div>a</div>")
+        exported = os.path.join(self.root, "artifact.sqlite")
+        self.cache.export(exported)
+        other = ParseCache(os.path.join(self.root, "other.sqlite"), "1")
+        self.addCleanup(other.close)
+        self.assertEqual(other.import_from(exported), 1)
+        self.assertEqual(other.get("a"), ("A", "<div>a</div>", {}))
+
+    def test_upgrades_old_schema(self):
+        path = os.path.join(self.root, "old.sqlite")
+        connection = sqlite3.connect(path)
+        connection.execute(
+            "CREATE TABLE pages (key TEXT NOT NULL, version TEXT NOT NULL, "
+            "title TEXT NOT NULL, html TEXT NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (key, version))"
+        )
+        connection.execute("INSERT INTO pages VALUES ('a', '1', 'A', '<p></p>', 0)")
+        connection.commit()
+        connection.close()
+        self.assertEqual(self.cache.import_from(path), 1)
+        self.assertEqual(self.cache.get("a"), ("A", "<p></p>", {}))
+        old = ParseCache(path, "1")
+        self.addCleanup(old.close)
+        old.put("b", "B", "<p></p>", {"draft": True})
+        self.assertEqual(old.get("b"), ("B", "<p></p>", {"draft": True}))
+
+    def test_pickles_by_path(self):
+        copy = pickle.loads(pickle.dumps(self.cache))
+        self.assertEqual((copy.path, copy.version), (self.path, "1"))
+
+    def test_build_uses_cache(self):
+        content = os.path.join(self.root, "content")
+        self.write("content/index.md", "# Home\n\nSome **text**")
+        template = self.write(
+            "template.html", '<a href="/">{{ Title }}</a>{{ Content }}'
+        )
+        public = os.path.join(self.root, "docs")
+
+        outputs = []
+        for _ in range(2):
+            generate_pages_recursive(
+                content,
+                template,
+                public,
+                "/site/",
+                verbose=False,
+                parse_cache=self.cache,
+            )
+            with open(os.path.join(public, "index.html")) as f:
+                outputs.append(f.read())
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(
+            outputs[0],
+            '<a href="/site/">Home</a>'
+            '<div><h1 id="home">Home</h1><p>Some <b>text</b></p></div>',
+        )
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import threading
+import unittest
+
+from gencontent import PageBuildError, generate_pages_recursive
+from pipeline import BackgroundWriter, open_mapped, prefetch
+from testsupport import TempDirTestCase
+
+
+class TestPipeline(TempDirTestCase):
+    def test_prefetch_keeps_order_and_bounds_depth(self):
+        started = []
+        lock = threading.Lock()
+        release = threading.Event()
+
+        def read(path):
+            with lock:
+                started.append(path)
+            release.wait()
+            return path.upper()
+
+        reads = prefetch(["a", "b", "c", "d", "e"], read, depth=2)
+        first = next(reads)
+        self.assertLessEqual(len(started), 3)
+        release.set()
+        results = [first.result()] + [future.result() for future in reads]
+        self.assertEqual(results, ["A", "B", "C", "D", "E"])
+
+    def test_background_writer(self):
+        path = os.path.join(self.root, "out", "index.html")
+        writer = BackgroundWriter(depth=1)
+        writer.write(path, "<p>hi</p>")
+        self.assertEqual(writer.close(), [])
+        with open(path) as f:
+            self.assertEqual(f.read(), "<p>hi</p>")
+
+    def test_background_writer_collects_errors(self):
+        def fail(path, text):
+            raise OSError("disk full")
+
+        writer = BackgroundWriter(write=fail)
+        writer.write("x.html", "x")
+        errors = writer.close()
+        self.assertEqual([path for path, _ in errors], ["x.html"])
+
+    def test_open_mapped(self):
+        path = self.write("page.md", "# Título\n".encode("utf-8"))
+        with open_mapped(path) as buffer:
+            self.assertEqual(buffer[:], "# Título\n".encode("utf-8"))
+        with open(path, "wb"):
+            pass
+        with open_mapped(path) as buffer:
+            self.assertEqual(buffer, b"")
+
+    def test_async_build_matches_sync(self):
+        content = os.path.join(self.root, "content")
+        for i in range(5):
+            self.write(f"content/p{i}/index.md", f"# Page {i}\n\n[home](/) text")
+        template = self.write(
+            "template.html", "<title>{{ Title }}</title>{{ Content }}"
+        )
+
+        outputs = []
+        for io_depth in (0, 2):
+            public = os.path.join(self.root, f"docs{io_depth}")
+            generate_pages_recursive(
+                content, template, public, "/site/", verbose=False, io_depth=io_depth
+            )
+            pages = {}
+            for i in range(5):
+                with open(os.path.join(public, f"p{i}", "index.html")) as f:
+                    pages[i] = f.read()
+            outputs.append(pages)
+        self.assertEqual(outputs[0], outputs[1])
+
+        self.write("content/p3/index.md", "no title")
+        with self.assertRaises(PageBuildError):
+            generate_pages_recursive(
+                content, template, public, "/", verbose=False, io_depth=2
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import unittest
+
+from buildreport import BuildReport
+from gencontent import generate_pages_recursive
+from search import (
+    SEARCH_DIR,
+    SearchIndex,
+    page_postings,
+    shard_name,
+    tokenize,
+    write_search_index,
+)
+from testsupport import TempDirTestCase
+
+
+class TestSearch(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "{{ Title }}{{ Content }}")
+        self.write(
+            os.path.join(self.content, "index.md"),
+            "# Elves\n\nThe **elves** of [Rivendell](/r)\n\n```\nsing()\n```",
+        )
+        self.write(
+            os.path.join(self.content, "draft", "index.md"),
+            "---\ndraft: true\n---\n\n# Secret elves",
+        )
+
+    def build(self):
+        index = SearchIndex(self.public)
+        report = BuildReport()
+        generate_pages_recursive(
+            self.content,
+            self.template,
+            self.public,
+            "/site/",
+            report=report,
+            verbose=False,
+            search_index=index,
+        )
+        write_search_index(index, "/site/", verbose=False)
+        return report
+
+    def read(self, name):
+        with open(os.path.join(self.public, SEARCH_DIR, name)) as f:
+            return json.load(f)
+
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("The Elves' song, a Tale"), ["the", "elves", "song", "tale"]
+        )
+
+    def test_page_postings(self):
+        postings = page_postings("Elves", ["the elves", "sing"])
+        self.assertEqual(postings, {"the": 1, "elves": 11, "sing": 1})
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("elves"), "el")
+        self.assertEqual(shard_name("é1"), "_1")
+
+    def test_writes_shards(self):
+        self.build()
+        index = self.read("index.json")
+        self.assertEqual(index["pages"], [["/site/", "Elves"]])
+        self.assertEqual(self.read("el.json")["elves"], [[0, 12]])
+        self.assertEqual(self.read("ri.json")["rivendell"], [[0, 1]])
+        self.assertIn("si", index["shards"])
+        self.assertNotIn("se", index["shards"])
+
+    def test_unchanged_pages_are_not_tokenized(self):
+        first = self.build()
+        self.assertTrue(all(page["search"][1] is not None for page in first.pages))
+        self.write(os.path.join(self.content, "other.md"), "# Other")
+        second = self.build()
+        tokenized = {
+            os.path.basename(page["source"]): page["search"][1] is not None
+            for page in second.pages
+        }
+        self.assertEqual(tokenized, {"index.md": False, "other.md": True})
+        self.assertEqual(len(self.read("index.json")["pages"]), 2)
+        self.assertEqual(self.read("el.json")["elves"], [[0, 12]])
+
+
+if __name__ == "__main__":
+    unittest.main()
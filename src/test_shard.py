@@ -0,0 +1,119 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from gencontent import GENERATOR_VERSION
+from linkcheck import find_output_files
+from shard import (
+    ShardError,
+    find_collisions,
+    load_shard_manifests,
+    parse_shard,
+    select_shard,
+    shard_of,
+)
+from testsupport import TempDirTestCase
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+SETTINGS = {"basepath": "/", "drafts": False}
+
+
+class TestShard(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "1/0", "1", "a/b"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_every_page_lands_in_one_shard(self):
+        pages = [
+            (os.path.join("content", f"p{i}", "index.md"), f"docs/p{i}/index.html")
+            for i in range(50)
+        ]
+        shards = [select_shard(pages, "content", (i, 4)) for i in range(1, 5)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(pages))
+        self.assertTrue(all(shards))
+        # the partition must not change between runs or machines
+        self.assertEqual(shard_of("blog/post/index.md", 4), 4)
+
+    def test_collisions(self):
+        manifests = [
+            ("a", {"outputs": ["index.html", "x.html"]}),
+            ("b", {"outputs": ["x.html"]}),
+        ]
+        self.assertEqual(find_collisions(manifests), ["x.html: a, b"])
+
+
+class TestShardedBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\n[post](/blog/p0/)")
+        for i in range(8):
+            self.write(
+                f"content/blog/p{i}/index.md",
+                f"---\ndate: 2024-01-0{i + 1}\ntags: elves\n---\n\n# Post {i}",
+            )
+        self.write("content/blog/draft/index.md", "---\ndraft: true\n---\n\n# Draft")
+
+    def run_main(self, *args):
+        return subprocess.Popen(
+            [sys.executable, MAIN, "-q", "--search", *args],
+            cwd=self.root,
+            stdout=subprocess.DEVNULL,
+        )
+
+    def read_tree(self, rel_path):
+        dir_path = os.path.join(self.root, rel_path)
+        tree = {}
+        for path in find_output_files(dir_path):
+            if not os.path.basename(path).startswith("."):
+                with open(os.path.join(dir_path, path), "rb") as f:
+                    tree[path] = f.read()
+        return tree
+
+    def test_merged_shards_match_a_single_build(self):
+        processes = [self.run_main("--shard", f"{i}/3") for i in range(1, 4)]
+        self.assertEqual([process.wait() for process in processes], [0, 0, 0])
+        shards = [f"shards/{i}-of-3" for i in range(1, 4)]
+        merge = self.run_main("--check-links", "--merge-shards", *shards)
+        self.assertEqual(merge.wait(), 0)
+        merged = self.read_tree("docs")
+        self.assertIn("tags/elves/index.html", merged)
+        self.assertIn("search-index/index.json", merged)
+        self.assertNotIn("blog/draft/index.html", merged)
+
+        os.rename(os.path.join(self.root, "docs"), os.path.join(self.root, "merged"))
+        self.assertEqual(self.run_main().wait(), 0)
+        self.assertEqual(self.read_tree("docs"), merged)
+
+    def test_merge_needs_every_shard(self):
+        self.assertEqual(self.run_main("--shard", "1/2").wait(), 0)
+        shard = os.path.join(self.root, "shards", "1-of-2")
+        with self.assertRaisesRegex(ShardError, "missing shards: 2"):
+            load_shard_manifests([shard], GENERATOR_VERSION, SETTINGS)
+        with self.assertRaisesRegex(ShardError, "given twice"):
+            load_shard_manifests([shard, shard], GENERATOR_VERSION, SETTINGS)
+        merge = self.run_main("--merge-shards", "shards/1-of-2")
+        self.assertEqual(merge.wait(), 1)
+
+    def test_merge_needs_matching_settings(self):
+        processes = [
+            self.run_main("--shard", "1/2"),
+            self.run_main("/site/", "--shard", "2/2"),
+        ]
+        self.assertEqual([process.wait() for process in processes], [0, 0])
+        shards = [os.path.join(self.root, "shards", f"{i}-of-2") for i in (1, 2)]
+        with self.assertRaisesRegex(ShardError, "2-of-2 was built with basepath"):
+            load_shard_manifests(shards, GENERATOR_VERSION, SETTINGS)
+        drafts = {**SETTINGS, "drafts": True}
+        with self.assertRaisesRegex(ShardError, "1-of-2 was built with drafts"):
+            load_shard_manifests(shards, GENERATOR_VERSION, drafts)
+        merge = self.run_main("--merge-shards", *shards)
+        self.assertEqual(merge.wait(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
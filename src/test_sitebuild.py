@@ -0,0 +1,71 @@
+import contextlib
+import io
+import os
+import unittest
+
+from sitebuild import BuildConfig, build_site
+from testsupport import TempDirTestCase
+
+
+class TestBuildSite(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.config = BuildConfig(
+            static=os.path.join(self.root, "static"),
+            public=os.path.join(self.root, "docs"),
+            content=os.path.join(self.root, "content"),
+            template=os.path.join(self.root, "template.html"),
+            verbose=False,
+        )
+        self.write(self.config.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.config.content, "index.md"), "# Home")
+        self.write(os.path.join(self.config.static, "index.css"), "body {}")
+
+    def build(self, config):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return build_site(config)
+
+    def test_builds_and_reports_changes(self):
+        result = self.build(self.config)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.changes["added"], ["index.css", "index.html"])
+        result = self.build(self.config.replace(incremental=True))
+        self.assertEqual(result.to_dict()["changes"]["added"], [])
+        self.assertEqual(result.changes["changed"], [])
+
+    def test_failures_are_returned(self):
+        self.write(os.path.join(self.config.content, "bad.md"), "no title")
+        result = self.build(self.config)
+        self.assertFalse(result.ok)
+        self.assertEqual(
+            result.failures,
+            [(os.path.join(self.config.content, "bad.md"), "no title found")],
+        )
+
+    def test_unexpected_errors_are_returned(self):
+        result = self.build(self.config.replace(content="/nonexistent"))
+        self.assertFalse(result.ok)
+        self.assertTrue(result.message.startswith("FileNotFoundError: "))
+
+    def test_drafts_are_not_published(self):
+        draft = os.path.join(self.config.content, "draft.md")
+        self.write(draft, "---\ndraft: true\n---\n\n# Draft")
+        output = os.path.join(self.config.public, "draft.html")
+        self.build(self.config)
+        self.assertFalse(os.path.exists(output))
+        incremental = self.config.replace(incremental=True)
+        result = self.build(incremental.replace(drafts=True))
+        self.assertEqual(result.changes["added"], ["draft.html"])
+        result = self.build(incremental)
+        self.assertEqual(result.changes["removed"], ["draft.html"])
+        self.assertFalse(os.path.exists(output))
+
+    def test_replace_rejects_unknown_settings(self):
+        self.assertEqual(self.config.replace(basepath="/a/").basepath, "/a/")
+        self.assertEqual(self.config.basepath, "/")
+        with self.assertRaises(TypeError):
+            self.config.replace(colour="red")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+
+from siteindex import (
+    FEED_FILENAME,
+    SITEMAP_FILENAME,
+    SiteIndex,
+    page_url,
+    write_site_index,
+)
+from template import Template
+
+
+class TestSiteIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.public = self.tmp.name
+        self.index = SiteIndex(self.public)
+        self.add("index.html", {"title": "Home"})
+        self.add("blog/old/index.html", {"title": "Old", "date": "2023-05-01"})
+        self.add(
+            "blog/new/index.html",
+            {"title": "New", "date": "2024-01-02", "tags": ["Elves & Men"]},
+        )
+        self.add("blog/undated/index.html", {"title": "Undated"})
+        self.add("blog/draft/index.html", {"title": "Draft", "draft": True})
+        self.template = Template("<title>{{ Title }}</title>{{ Content }}", "/site/")
+
+    def add(self, rel_path, meta):
+        self.index.add(os.path.join(self.public, rel_path), rel_path, meta)
+
+    def read(self, rel_path):
+        with open(os.path.join(self.public, rel_path)) as f:
+            return f.read()
+
+    def test_page_url(self):
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url("blog/tom/index.html"), "/blog/tom/")
+        self.assertEqual(page_url("about.html"), "/about.html")
+
+    def test_groupings(self):
+        self.index.build()
+        titles = [entry["title"] for entry in self.index.published]
+        self.assertEqual(titles, ["New", "Old", "Undated", "Home"])
+        self.assertEqual(
+            [entry["title"] for entry in self.index.sections["blog"]],
+            ["New", "Old", "Undated"],
+        )
+        self.assertEqual(list(self.index.tags), ["Elves & Men"])
+        self.assertEqual(sorted(self.index.years), ["2023", "2024"])
+
+    def test_write_listings(self):
+        written = write_site_index(self.index, self.template, "/site/", verbose=False)
+        self.assertEqual(
+            written,
+            ["blog/index.html", "tags/elves-men/index.html", "tags/index.html"],
+        )
+        blog = self.read("blog/index.html")
+        self.assertIn('<h2>2024</h2><ul><li><a href="/site/blog/new/">New</a>', blog)
+        self.assertNotIn("Draft", blog)
+
+    def test_tag_slugs_never_collide(self):
+        self.add("blog/c/index.html", {"title": "C", "tags": ["C", "C++", "日本"]})
+        written = write_site_index(self.index, self.template, "/site/", verbose=False)
+        slugs = self.index.tag_slugs
+        self.assertEqual((slugs["C"], slugs["C++"]), ("c", "c-2"))
+        self.assertRegex(slugs["日本"], r"^tag-[0-9a-f]{8}$")
+        self.assertEqual(len(set(slugs.values())), len(slugs))
+        self.assertIn(f"tags/{slugs['日本']}/index.html", written)
+        self.assertIn('<a href="/site/tags/c-2/">C++</a>', self.read("tags/index.html"))
+
+    def test_colliding_listings_fail(self):
+        self.add("tags/post/index.html", {"title": "Post", "tags": ["x"]})
+        with self.assertRaisesRegex(ValueError, "tags/index.html"):
+            write_site_index(self.index, self.template, "/site/", verbose=False)
+
+    def test_sitemap_and_feed(self):
+        write_site_index(
+            self.index, self.template, "/site/", "https://example.com/", False
+        )
+        sitemap = self.read(SITEMAP_FILENAME)
+        self.assertIn("<loc>https://example.com/site/blog/new/</loc>", sitemap)
+        self.assertIn("<lastmod>2024-01-02</lastmod>", sitemap)
+        self.assertIn("<loc>https://example.com/site/blog/</loc>", sitemap)
+        feed = self.read(FEED_FILENAME)
+        self.assertIn("<title>Home</title>", feed)
+        self.assertEqual(feed.count("<item>"), 2)
+        self.assertIn("<category>Elves &amp; Men</category>", feed)
+        self.assertIn("<pubDate>Tue, 02 Jan 2024 00:00:00 +0000</pubDate>", feed)
+
+    def test_removes_stale_listings(self):
+        write_site_index(self.index, self.template, verbose=False)
+        del self.index.pages["blog/new/index.html"]
+        write_site_index(self.index, self.template, verbose=False)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "tags")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
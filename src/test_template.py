@@ -0,0 +1,88 @@
+import io
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(
+            template.render(Title="Hi", Content="<p>body</p>"),
+            "<title>Hi</title><main><p>body</p></main>",
+        )
+
+    def test_repeated_slot(self):
+        template = Template("{{ Title }}|{{ Title }}")
+        self.assertEqual(template.render(Title="x"), "x|x")
+
+    def test_unknown_slot_left_in_place(self):
+        template = Template("{{ Title }} {{ Footer }}")
+        self.assertEqual(template.render(Title="x"), "x {{ Footer }}")
+
+    def test_basepath_rewrites_template_and_content(self):
+        template = Template(
+            '<link href="/index.css">{{ Content }}', basepath="/staticsite/"
+        )
+        self.assertEqual(
+            template.render(Content='<a href="/blog">b</a><img src="/a.png">'),
+            '<link href="/staticsite/index.css"><a href="/staticsite/blog">b</a>'
+            '<img src="/staticsite/a.png">',
+        )
+
+    def test_matches_replace_chain(self):
+        text = (
+            '<html><title> {{ Title }} </title><link href="/index.css">'
+            "<article>{{ Content }}</article></html>"
+        )
+        content = '<p><a href="/contact">c</a> <img src="/images/x.png" alt="x"></p>'
+        basepath = "/site/"
+        expected = text.replace("{{ Title }}", "T").replace("{{ Content }}", content)
+        expected = expected.replace('href="/', 'href="' + basepath)
+        expected = expected.replace('src="/', 'src="' + basepath)
+        self.assertEqual(
+            Template(text, basepath).render(Title="T", Content=content), expected
+        )
+
+
+    def test_write_streams_nodes(self):
+        template = Template('<link href="/a.css">{{ Content }}', "/site/")
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", "x", {"href": "/blog"}),
+                LeafNode(None, 'raw <a hre'),
+                LeafNode(None, 'f="/split">y</a>'),
+            ],
+        )
+        stream = io.StringIO()
+        template.write(stream, Content=node)
+        self.assertEqual(
+            stream.getvalue(),
+            '<link href="/site/a.css"><p><a href="/site/blog">x</a>'
+            'raw <a href="/site/split">y</a></p>',
+        )
+        self.assertEqual(
+            template.render(Content=node.to_html()), stream.getvalue()
+        )
+
+    def test_sizes_images(self):
+        template = Template("{{ Content }}", "/site/", images={"/a.png": (4, 3)})
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("img", "", {"src": "/a.png", "alt": "a"}),
+                LeafNode("img", "", {"src": "https://x.org/b.png", "alt": "b"}),
+            ],
+        )
+        expected = (
+            '<p><img src="/site/a.png" width="4" height="3" loading="lazy" alt="a">'
+            '</img><img src="https://x.org/b.png" loading="lazy" alt="b"></img></p>'
+        )
+        self.assertEqual(template.render(Content=node), expected)
+        self.assertEqual(template.render(Content=node.to_html()), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
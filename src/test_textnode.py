@@ -55,6 +55,16 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         self.assertEqual(html_node.value, "This is bold")
 
 
+    def test_link(self):
+        node = TextNode("click", TextType.LINK, "/blog")
+        html_node = text_node_to_html_node(node)
+        self.assertEqual(html_node.to_html(), '<a href="/blog">click</a>')
+
+    def test_invalid_type(self):
+        with self.assertRaises(ValueError):
+            text_node_to_html_node(TextNode("x", "underline"))
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,80 @@
+import unittest
+
+from markdown_blocks import markdown_to_html_node, markdown_to_page
+from toc import Outline, render_toc, slugify
+
+
+class TestToc(unittest.TestCase):
+    def test_slugify(self):
+        self.assertEqual(slugify("Why Tom Was a Mistake"), "why-tom-was-a-mistake")
+        self.assertEqual(slugify("  C++ & Rust: 2024!  "), "c-rust-2024")
+        self.assertEqual(slugify("Título"), "título")
+        self.assertEqual(slugify("!!!"), "section")
+
+    def test_outline_ids_do_not_collide(self):
+        outline = Outline()
+        texts = ("Intro", "Intro", "Intro 1", "Intro")
+        ids = [outline.add(2, text) for text in texts]
+        self.assertEqual(ids, ["intro", "intro-1", "intro-1-1", "intro-2"])
+
+    def test_headings_get_ids_while_rendering(self):
+        md = "# Page\n\n## **Bold** heading\n\ntext\n\n### Sub\n\n## Bold heading"
+        meta, node = markdown_to_page(md)
+        self.assertEqual(
+            meta["outline"],
+            [
+                [1, "page", "Page"],
+                [2, "bold-heading", "Bold heading"],
+                [3, "sub", "Sub"],
+                [2, "bold-heading-1", "Bold heading"],
+            ],
+        )
+        html = node.to_html()
+        self.assertIn('<h2 id="bold-heading"><b>Bold</b> heading</h2>', html)
+        self.assertIn('<h2 id="bold-heading-1">', html)
+
+    def test_outline_argument(self):
+        outline = Outline()
+        node = markdown_to_html_node("## A\n\n## A", outline=outline)
+        self.assertEqual(
+            node.to_html(), '<div><h2 id="a">A</h2><h2 id="a-1">A</h2></div>'
+        )
+        self.assertEqual(
+            markdown_to_html_node("## A").to_html(), "<div><h2>A</h2></div>"
+        )
+
+    def test_render_toc(self):
+        outline = [
+            [1, "page", "Page"],
+            [2, "a", "A"],
+            [3, "a1", "A1"],
+            [3, "a2", "A2"],
+            [2, "b", "B"],
+        ]
+        self.assertEqual(
+            render_toc(outline),
+            '<nav class="toc"><ul><li><a href="#a">A</a><ul>'
+            '<li><a href="#a1">A1</a></li><li><a href="#a2">A2</a></li></ul></li>'
+            '<li><a href="#b">B</a></li></ul></nav>',
+        )
+        self.assertEqual(render_toc([[1, "page", "Page"]]), "")
+
+    def test_render_toc_unbalanced_levels(self):
+        toc = render_toc([[4, "d", "D"], [2, "b", "B"], [5, "e", "E"], [3, "c", "C"]])
+        self.assertEqual(toc.count("<ul>"), toc.count("</ul>"))
+        self.assertEqual(toc.count("<li>"), toc.count("</li>"))
+
+
+    def test_render_toc_nests_under_shallower_heading(self):
+        outline = [[2, "a", "A"], [4, "b", "B"], [3, "c", "C"], [2, "d", "D"]]
+        self.assertEqual(
+            render_toc(outline),
+            '<nav class="toc"><ul><li><a href="#a">A</a>'
+            '<ul><li><a href="#b">B</a></li></ul>'
+            '<ul><li><a href="#c">C</a></li></ul></li>'
+            '<li><a href="#d">D</a></li></ul></nav>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
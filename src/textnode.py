@@ -12,6 +12,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -28,18 +30,20 @@ class TextNode:
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
-def text_node_to_html_node(text_node):
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
-    if text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-    if text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-    if text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
-    if text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
-    if text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-    raise ValueError(f"invalid text type: {text_node.text_type}")
+TEXT_NODE_CONVERTERS = {
+    TextType.TEXT: lambda node: LeafNode(None, node.text),
+    TextType.BOLD: lambda node: LeafNode("b", node.text),
+    TextType.ITALIC: lambda node: LeafNode("i", node.text),
+    TextType.CODE: lambda node: LeafNode("code", node.text),
+    TextType.LINK: lambda node: LeafNode("a", node.text, {"href": node.url}),
+    TextType.IMAGE: lambda node: LeafNode(
+        "img", "", {"src": node.url, "alt": node.text}
+    ),
+}
 
+
+def text_node_to_html_node(text_node):
+    converter = TEXT_NODE_CONVERTERS.get(text_node.text_type)
+    if converter is None:
+        raise ValueError(f"invalid text type: {text_node.text_type}")
+    return converter(text_node)
@@ -0,0 +1,55 @@
+import re
+
+
+SLUG_STRIP_PATTERN = re.compile(r"[^\w\s-]")
+SLUG_SPACE_PATTERN = re.compile(r"[\s_]+")
+
+
+def slugify(text):
+    slug = SLUG_STRIP_PATTERN.sub("", text.lower())
+    slug = SLUG_SPACE_PATTERN.sub("-", slug).strip("-")
+    return slug or "section"
+
+
+class Outline:
+    # collects headings while blocks render; ids repeat GitHub's scheme of
+    # suffixing -1, -2, ... and skip suffixes a later heading already took
+    __slots__ = ("entries", "used")
+
+    def __init__(self):
+        self.entries = []
+        self.used = set()
+
+    def add(self, level, text):
+        base = slugify(text)
+        heading_id = base
+        suffix = 0
+        while heading_id in self.used:
+            suffix += 1
+            heading_id = f"{base}-{suffix}"
+        self.used.add(heading_id)
+        self.entries.append([level, heading_id, text])
+        return heading_id
+
+
+def render_toc(outline, min_level=2):
+    # nests one <ul> per level under the nearest shallower open heading; only
+    # the top list stays open for a heading shallower than the first one
+    parts = []
+    levels = []
+    for level, heading_id, text in outline:
+        if level < min_level:
+            continue
+        while len(levels) > 1 and levels[-1] > level:
+            levels.pop()
+            parts.append("</li></ul>")
+        if levels and levels[-1] >= level:
+            parts.append("</li>")
+        else:
+            parts.append("<ul>")
+            levels.append(level)
+        parts.append(f'<li><a href="#{heading_id}">{text}</a>')
+    if not levels:
+        return ""
+    parts.append("</li></ul>" * len(levels))
+    return f'<nav class="toc">{"".join(parts)}</nav>'